@@ -1,12 +1,12 @@
 # app.py - 系统入口
 
 import streamlit as st
-from core.database import init_db
+from core.database import ensure_db
 from core.auth import check_login, get_current_user, login, logout
 from config import get_role_display
 
-# 初始化数据库
-init_db()
+# 初始化数据库（每个进程只执行一次）
+ensure_db()
 
 st.set_page_config(
     page_title="需求管理系统",
@@ -1,8 +1,9 @@
 # components/admin_views.py - 管理端视图组件（优化版）
 
+import os
 import streamlit as st
 import pandas as pd
-from io import BytesIO
+from core.timeutils import format_ts
 
 
 def render_time_selector(key_prefix: str = "") -> tuple:
@@ -143,34 +144,55 @@ def render_detail_table(data: list, title: str):
     st.dataframe(df, use_container_width=True, hide_index=True)
 
 
-def render_request_list_simple(requests: list):
-    """渲染简化的需求列表"""
+def render_request_item_simple(req: dict, key_prefix: str = "simple"):
+    """渲染简化的需求列表项（配合 render_paged_request_list 使用）"""
     from config import get_status_display
+    from components.tables import render_request_content
 
-    if not requests:
-        st.info("暂无需求")
+    status_display = get_status_display(req['status'])
+    confidential_badge = "🔒 " if req.get('is_confidential') else ""
+
+    with st.expander(f"{confidential_badge}**{req['title']}** - {status_display}"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write(f"**需求类型:** {req.get('request_type') or '-'}")
+            st.write(f"**研究范畴:** {req.get('research_scope') or '-'}")
+            st.write(f"**工时:** {req.get('work_hours') or 0:.1f}H")
+        with col2:
+            st.write(f"**销售:** {req.get('sales_name', '-')}")
+            st.write(f"**研究员:** {req.get('researcher_name', '-')}")
+            st.write(f"**创建时间:** {format_ts(req.get('created_at'))}")
+
+        # 描述和处理结果按需加载
+        render_request_content(req, key_prefix=key_prefix)
+
+
+def render_trend_chart(data: list, y_field: str, title: str, color_field: str = None, key: str = None):
+    """渲染趋势折线图（data 为 get_trend_series 的结果）"""
+    if not data:
+        st.info("暂无数据")
         return
 
-    for req in requests:
-        status_display = get_status_display(req['status'])
-        confidential_badge = "🔒 " if req.get('is_confidential') else ""
+    import plotly.express as px
+
+    df = pd.DataFrame(data)
+    fig = px.line(df, x='bucket', y=y_field, color=color_field, title=title, markers=len(df) <= 60)
+    fig.update_layout(height=350, xaxis_title=None, yaxis_title=None, legend_title_text=None)
+    st.plotly_chart(fig, use_container_width=True, key=key or f"trend_{title}")
+
 
-        with st.expander(f"{confidential_badge}**{req['title']}** - {status_display}"):
-            col1, col2 = st.columns(2)
-            with col1:
-                st.write(f"**需求类型:** {req.get('request_type') or '-'}")
-                st.write(f"**研究范畴:** {req.get('research_scope') or '-'}")
-                st.write(f"**工时:** {req.get('work_hours', 0):.1f}H")
-            with col2:
-                st.write(f"**销售:** {req.get('sales_name', '-')}")
-                st.write(f"**研究员:** {req.get('researcher_name', '-')}")
-                st.write(f"**创建时间:** {req.get('created_at', '-')}")
+def render_aging_chart(histogram: list, key: str = "aging_bar"):
+    """渲染未完成需求账龄分布（按状态堆叠）"""
+    if not any(row['total'] for row in histogram):
+        st.info("暂无未完成需求")
+        return
 
-            if req.get('description'):
-                st.write(f"**描述:** {req['description']}")
-            if req.get('result_note'):
-                st.write(f"**处理结果:** {req['result_note']}")
+    import plotly.express as px
 
+    df = pd.DataFrame(histogram).rename(columns={'pending': '待处理', 'in_progress': '处理中'})
+    fig = px.bar(df, x='bucket', y=['待处理', '处理中'], title='账龄分布')
+    fig.update_layout(height=300, xaxis_title=None, yaxis_title=None, legend_title_text=None)
+    st.plotly_chart(fig, use_container_width=True, key=key)
 
 # ============================================================
 # 优化后的多时间维度表格
@@ -347,33 +369,95 @@ def render_multi_period_request_type_table(data: list):
     )
 
 
-def export_to_excel(data: list, filename: str = "导出数据.xlsx") -> bytes:
-    """导出数据到Excel"""
+# 导出列: (表头, 取值函数)
+def _export_columns():
     from config import get_org_type, get_status_display
 
-    export_data = []
-    for r in data:
-        status_text = get_status_display(r.get('status', '')).replace('🟡 ', '').replace('🔵 ', '').replace('🟢 ', '')
-
-        export_data.append({
-            '事项': r.get('title', ''),
-            '内容概要': r.get('description', ''),
-            '研究范畴': r.get('research_scope', ''),
-            '需求类型': r.get('request_type', ''),
-            '客户名': r.get('org_name', ''),
-            '客户类型': r.get('org_type') or get_org_type(r.get('org_name', '')),
-            '对应销售': r.get('sales_name', ''),
-            '承接研究员': r.get('researcher_name', ''),
-            '工时消耗（H）': r.get('work_hours', 0),
-            '状态': status_text,
-            '是否保密': '是' if r.get('is_confidential') else '否',
-            '创建时间': r.get('created_at', ''),
-            '完成时间': r.get('completed_at', ''),
-            '处理结果': r.get('result_note', ''),
-        })
-
-    df = pd.DataFrame(export_data)
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='需求明细')
-    return output.getvalue()
\ No newline at end of file
+    def status_text(r):
+        return get_status_display(r.get('status', '')).replace('🟡 ', '').replace('🔵 ', '').replace('🟢 ', '')
+
+    return [
+        ('事项', lambda r: r.get('title', '')),
+        ('内容概要', lambda r: r.get('description', '')),
+        ('研究范畴', lambda r: r.get('research_scope', '')),
+        ('需求类型', lambda r: r.get('request_type', '')),
+        ('客户名', lambda r: r.get('org_name', '')),
+        ('客户类型', lambda r: r.get('org_type') or get_org_type(r.get('org_name', ''))),
+        ('对应销售', lambda r: r.get('sales_name', '')),
+        ('承接研究员', lambda r: r.get('researcher_name', '')),
+        ('工时消耗（H）', lambda r: r.get('work_hours', 0)),
+        ('状态', status_text),
+        ('是否保密', lambda r: '是' if r.get('is_confidential') else '否'),
+        ('创建时间', lambda r: format_ts(r.get('created_at'), default='')),
+        ('完成时间', lambda r: format_ts(r.get('completed_at'), default='')),
+        ('处理结果', lambda r: r.get('result_note', '')),
+    ]
+
+
+def _export_header(ws, headers: list) -> list:
+    """表头行：与 pandas 导出的表头样式一致（加粗、细边框、水平居中）"""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    thin = Side(style="thin")
+    cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = Font(bold=True)
+        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        cell.alignment = Alignment(horizontal="center", vertical="top")
+        cells.append(cell)
+    return cells
+
+
+def export_to_excel_file(rows) -> tuple[str, int]:
+    """
+    流式导出到临时 Excel 文件
+    rows: 需求的可迭代对象（如 iter_filtered_requests 的生成器），逐行写入，不整体载入内存
+    使用 openpyxl 只写模式，已写入的行不保留在内存中
+    返回: (临时文件路径, 行数)，文件由调用方删除
+    """
+    import tempfile
+    from openpyxl import Workbook
+
+    columns = _export_columns()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('需求明细')
+    ws.append(_export_header(ws, [header for header, _ in columns]))
+
+    count = 0
+    for r in rows:
+        ws.append([getter(r) for _, getter in columns])
+        count += 1
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    wb.save(path)
+    return path, count
+
+
+def render_excel_download(rows, file_name: str, use_container_width: bool = False) -> int:
+    """
+    把 rows 流式写入临时 Excel 文件并渲染下载按钮，临时文件随后删除
+    没有数据时显示提示
+    读取数据库和生成工作簿的内存占用与行数无关；但 st.download_button 会把
+    文件内容整体读入 Streamlit 的媒体文件管理器，最终仍需占用一份（已压缩的）
+    xlsx 文件大小的内存，直到会话不再引用该按钮
+    返回: 导出行数
+    """
+    path, count = export_to_excel_file(rows)
+    try:
+        if count:
+            with open(path, "rb") as f:
+                st.download_button(
+                    label=f"💾 下载Excel文件（{count} 条）",
+                    data=f,
+                    file_name=file_name,
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=use_container_width
+                )
+        else:
+            st.warning("没有符合条件的数据")
+    finally:
+        os.remove(path)
+    return count
@@ -36,33 +36,3 @@ def render_research_scope_filter(key: str = "scope_filter") -> str | None:
 def render_keyword_filter(key: str = "keyword_filter") -> str:
     """渲染关键词搜索框"""
     return st.text_input("搜索（事项名称/机构）", key=key)
-
-
-def apply_filters(requests: list, filters: dict) -> list:
-    """
-    应用筛选条件
-    filters: {
-        'status': str | None,
-        'request_type': str | None,
-        'research_scope': str | None,
-        'keyword': str,
-    }
-    """
-    result = requests
-    
-    if filters.get('status'):
-        result = [r for r in result if r['status'] == filters['status']]
-    
-    if filters.get('request_type'):
-        result = [r for r in result if r.get('request_type') == filters['request_type']]
-    
-    if filters.get('research_scope'):
-        result = [r for r in result if r.get('research_scope') == filters['research_scope']]
-    
-    if filters.get('keyword'):
-        kw = filters['keyword'].lower()
-        result = [r for r in result 
-                  if kw in (r.get('title') or '').lower() 
-                  or kw in (r.get('org_name') or '').lower()]
-    
-    return result
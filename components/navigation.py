@@ -0,0 +1,14 @@
+# components/navigation.py - 页面导航组件
+
+import streamlit as st
+
+
+def render_tab_nav(tabs: list, key: str) -> str:
+    """
+    渲染标签页导航，返回当前选中的标签名
+    st.tabs 每次 rerun 都会执行所有标签的内容；这里用单选状态代替，
+    页面只需执行选中标签的代码，未选中的标签不查询也不渲染
+    """
+    selected = st.radio("导航", tabs, key=key, horizontal=True, label_visibility="collapsed")
+    st.divider()
+    return selected
@@ -0,0 +1,54 @@
+# components/pagination.py - 游标分页组件
+
+import streamlit as st
+
+
+def get_page_request(key: str, reset_token=None) -> dict:
+    """
+    获取当前应加载的页
+    key: 分页器唯一标识
+    reset_token: 筛选条件等，变化时回到第一页
+    返回: {'cursor': 起始游标, 'with_total': 是否需要重新统计总数}
+    """
+    state_key = f"{key}_pager"
+    state = st.session_state.get(state_key)
+    if state is None or state['token'] != reset_token:
+        state = {'cursors': [None], 'token': reset_token, 'total': None}
+        st.session_state[state_key] = state
+
+    cursor = state['cursors'][-1]
+    # 总数只在第一页或尚未统计时查询，翻页时沿用
+    return {'cursor': cursor, 'with_total': cursor is None or state['total'] is None}
+
+
+def get_page_total(key: str, page: dict) -> int | None:
+    """记录并返回分页总数"""
+    state = st.session_state[f"{key}_pager"]
+    if page.get('total') is not None:
+        state['total'] = page['total']
+    return state['total']
+
+
+def render_pager(key: str, page: dict, page_size: int = None):
+    """渲染上一页/下一页导航，已知总数和每页条数时显示总页数"""
+    state = st.session_state[f"{key}_pager"]
+    page_no = len(state['cursors'])
+    page_count = None
+    if page_size and state['total'] is not None:
+        page_count = max((state['total'] + page_size - 1) // page_size, 1)
+
+    if page_no == 1 and not page.get('next_cursor'):
+        return
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ 上一页", key=f"{key}_prev", disabled=page_no == 1, use_container_width=True):
+            state['cursors'].pop()
+            st.rerun()
+    with col2:
+        st.caption(f"第 {page_no} / {page_count} 页" if page_count else f"第 {page_no} 页")
+    with col3:
+        if st.button("下一页 ➡️", key=f"{key}_next", disabled=not page.get('next_cursor'),
+                     use_container_width=True):
+            state['cursors'].append(page['next_cursor'])
+            st.rerun()
@@ -2,50 +2,112 @@
 
 import os
 import streamlit as st
-from config import get_status_display
+from config import get_status_display, PAGE_SIZE
+from core.timeutils import format_ts
+from components.pagination import get_page_request, get_page_total, render_pager
+from services.request_service import get_request_by_id, list_attachments, list_attachments_for_requests
+from services.attachment_store import get_thumbnail
 
 
-def render_request_list(
-    requests: list,
+# 每页条数可选项
+PAGE_SIZE_OPTIONS = (10, 20, 50, 100)
+
+
+def render_paged_request_list(
+    key: str,
+    fetch_page: callable,
+    reset_token=None,
+    render_item: callable = None,
+    empty_text: str = "暂无需求记录",
+    **item_options
+) -> dict:
+    """
+    分页渲染需求列表：每次只查询并渲染一页，渲染开销只取决于每页条数
+
+    参数:
+        key: 列表唯一标识（分页状态、控件 key 前缀）
+        fetch_page: 分页查询函数，接收 cursor / page_size / with_total 关键字参数，
+                    返回 {'items', 'next_cursor', 'total'}，
+                    如 lambda **kw: get_requests_by_sales_page(user_id, filters, **kw)
+        reset_token: 筛选条件等，变化时回到第一页
+        render_item: 渲染单条需求的函数 render_item(req)，默认 render_request_item
+        empty_text: 没有数据时的提示
+        item_options: 传给默认 render_request_item 的参数
+    返回: 当前页 {'items', 'next_cursor', 'total'}
+    """
+    col1, col2 = st.columns([4, 1])
+    with col2:
+        page_size = st.selectbox(
+            "每页条数",
+            PAGE_SIZE_OPTIONS,
+            index=PAGE_SIZE_OPTIONS.index(PAGE_SIZE) if PAGE_SIZE in PAGE_SIZE_OPTIONS else 0,
+            key=f"{key}_page_size"
+        )
+
+    page_req = get_page_request(key, reset_token=(reset_token, page_size))
+    page = fetch_page(page_size=page_size, **page_req)
+
+    with col1:
+        st.write(f"共 {get_page_total(key, page)} 条记录")
+
+    # 一次索引查询取出本页所有需求的附件元数据，列表项渲染时不再逐条查询
+    attachments = list_attachments_for_requests([req['id'] for req in page['items']])
+    for req in page['items']:
+        req['attachments'] = attachments[req['id']]
+
+    if not page['items']:
+        st.info(empty_text)
+    elif render_item is None:
+        item_options.setdefault('key_prefix', key)
+        for req in page['items']:
+            render_request_item(req, **item_options)
+    else:
+        for req in page['items']:
+            render_item(req)
+
+    render_pager(key, page, page_size)
+    return page
+
+
+def render_request_item(
+    req: dict,
     show_sales: bool = False,
     show_researcher: bool = True,
     show_confidential_badge: bool = False,
     current_user: dict = None,
-    on_status_update: callable = None
+    on_status_update: callable = None,
+    key_prefix: str = "list"
 ):
     """
-    渲染需求列表
-    
+    渲染单条需求（折叠面板）
+
     参数:
-        requests: 需求列表
+        req: 需求（摘要字段即可）
         show_sales: 是否显示销售人员
         show_researcher: 是否显示研究员
         show_confidential_badge: 是否显示保密标记
         current_user: 当前用户（用于判断是否可编辑）
         on_status_update: 状态更新回调（研究员端用）
+        key_prefix: 控件 key 前缀
     """
-    if not requests:
-        st.info("暂无需求记录")
-        return
-    
-    for req in requests:
-        status_display = get_status_display(req['status'])
-        
-        # 构建标题
-        title_parts = [f"**{req['title']}**", f"- {status_display}"]
-        if show_confidential_badge and req.get('is_confidential'):
-            title_parts.insert(0, "🔒")
-        
-        expander_title = " ".join(title_parts)
-        
-        with st.expander(expander_title):
-            _render_request_detail(
-                req,
-                show_sales=show_sales,
-                show_researcher=show_researcher,
-                current_user=current_user,
-                on_status_update=on_status_update
-            )
+    status_display = get_status_display(req['status'])
+
+    # 构建标题
+    title_parts = [f"**{req['title']}**", f"- {status_display}"]
+    if show_confidential_badge and req.get('is_confidential'):
+        title_parts.insert(0, "🔒")
+
+    expander_title = " ".join(title_parts)
+
+    with st.expander(expander_title):
+        _render_request_detail(
+            req,
+            show_sales=show_sales,
+            show_researcher=show_researcher,
+            current_user=current_user,
+            on_status_update=on_status_update,
+            key_prefix=key_prefix
+        )
 
 
 def _render_request_detail(
@@ -53,7 +115,8 @@ def _render_request_detail(
     show_sales: bool,
     show_researcher: bool,
     current_user: dict,
-    on_status_update: callable
+    on_status_update: callable,
+    key_prefix: str = "list"
 ):
     """渲染单个需求的详情"""
     col1, col2 = st.columns(2)
@@ -68,46 +131,77 @@ def _render_request_detail(
             st.write(f"**销售:** {req.get('sales_name', '-')}")
         if show_researcher:
             st.write(f"**研究员:** {req.get('researcher_name', '-')}")
-        st.write(f"**创建时间:** {req.get('created_at', '-')}")
-    
-    if req.get('description'):
-        st.write(f"**描述:** {req['description']}")
+        st.write(f"**创建时间:** {format_ts(req.get('created_at'))}")
     
-    # 已完成的显示结果
-    if req['status'] == 'completed':
-        st.divider()
-        st.write("**📌 处理结果:**")
-        st.write(req.get('result_note') or '-')
-        _render_attachment(req)
+    # 描述；已完成的显示结果
+    render_request_content(req, key_prefix=key_prefix)
     
     # 研究员可更新状态
-    elif on_status_update and current_user:
+    if req['status'] != 'completed' and on_status_update and current_user:
         is_assigned_researcher = current_user['id'] == req.get('researcher_id')
         if is_assigned_researcher:
             st.divider()
             _render_status_update_section(req, on_status_update)
 
 
-def _render_attachment(req: dict):
-    """渲染附件下载和预览"""
-    file_path = req.get('attachment_path')
-    if not file_path or not os.path.exists(file_path):
+def render_request_content(req: dict, key_prefix: str, show_result: bool = True):
+    """
+    渲染需求描述、处理结果和附件
+    列表只查询摘要字段，打开「查看详情」后才按ID加载完整记录
+    """
+    if not st.toggle("📄 查看详情", key=f"{key_prefix}_detail_{req['id']}"):
         return
-    
-    file_name = os.path.basename(file_path)
-    with open(file_path, "rb") as f:
-        file_data = f.read()
-    
-    st.download_button(
-        label=f"📎 下载: {file_name}",
-        data=file_data,
-        file_name=file_name,
-        key=f"download_{req['id']}"
-    )
-    
-    # 图片预览
-    if file_name.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
-        st.image(file_path, caption=file_name, width=400)
+
+    detail = get_request_by_id(req['id']) or req
+
+    if detail.get('description'):
+        st.write(f"**描述:** {detail['description']}")
+
+    if show_result and detail['status'] == 'completed':
+        st.divider()
+        st.write("**📌 处理结果:**")
+        st.write(detail.get('result_note') or '-')
+        # 分页列表已批量带上附件元数据，其他调用方按需查询
+        attachments = req['attachments'] if 'attachments' in req else list_attachments(req['id'])
+        for attachment in attachments:
+            _render_attachment(attachment, key_prefix)
+
+
+@st.fragment
+def _render_attachment(attachment: dict, key_prefix: str = "list"):
+    """
+    渲染单个附件的下载和预览（attachment 为附件元数据）
+    文件内容只在点击「准备下载」后的那一次局部重跑中读取，其他重跑不读文件
+    """
+    file_name = attachment['file_name']
+    file_path = attachment['storage_path']
+    prepared_key = f"{key_prefix}_download_ready_{attachment['id']}"
+
+    if st.session_state.pop(prepared_key, False):
+        if not os.path.exists(file_path):
+            st.warning(f"附件文件不存在: {file_name}")
+            return
+        with open(file_path, "rb") as f:
+            st.download_button(
+                label=f"📎 下载: {file_name}",
+                data=f.read(),
+                file_name=file_name,
+                mime=attachment.get('mime'),
+                key=f"{key_prefix}_download_{attachment['id']}"
+            )
+    else:
+        # 回调在重跑前执行，本次局部重跑即可读取文件
+        st.button(
+            f"📎 准备下载: {file_name}",
+            key=f"{key_prefix}_prepare_{attachment['id']}",
+            on_click=st.session_state.__setitem__,
+            args=(prepared_key, True)
+        )
+
+    # 图片预览只发送缩略图
+    thumbnail = get_thumbnail(attachment)
+    if thumbnail:
+        st.image(thumbnail, caption=file_name)
 
 
 def _render_status_update_section(req: dict, on_status_update: callable):
@@ -51,6 +51,24 @@ REQUEST_STATUS = {
     "completed": {"label": "已完成", "icon": "🟢"},
 }
 
+# ============================================================
+# 业务时区（数据库存 epoch 秒，按此时区划分日/周/月）
+# 修改后需重算日汇总表：core.migrations.rebuild_rollup
+# ============================================================
+TIMEZONE_OFFSET_HOURS = 8
+
+# ============================================================
+# 列表分页
+# ============================================================
+PAGE_SIZE = 20
+
+# ============================================================
+# 附件存储（按内容 SHA-256 寻址，相同文件只存一份）
+# ============================================================
+UPLOAD_DIR = "uploads"
+ATTACHMENT_CHUNK_SIZE = 1024 * 1024  # 上传流式写入的分块大小（字节）
+THUMBNAIL_MAX_SIZE = 400             # 图片预览缩略图的最长边（像素）
+
 # ============================================================
 # 角色定义
 # ============================================================
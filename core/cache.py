@@ -0,0 +1,97 @@
+# core/cache.py - 查询结果缓存（写入失效）
+#
+# 被 @cached 装饰的函数按 函数 + 参数 缓存结果，每条缓存记录写入时的数据版本；
+# 数据版本由两部分组成：
+#   - 进程内计数：本进程修改需求/用户后调用 bump_data_version()
+#   - SQLite 的 PRAGMA data_version：其他连接（包括其他 Streamlit 进程）提交写入后变化
+# 任一部分变化，旧版本的缓存自动失效。
+
+import copy
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from core import database
+
+_data_version = 0
+_version_lock = threading.Lock()
+
+# 每个数据库文件一个只用于读取 data_version 的专用连接。
+# data_version 只反映"其他连接"的提交，所以不能使用连接池里会执行写入的连接。
+_watchers: dict[str, sqlite3.Connection] = {}
+_watcher_lock = threading.Lock()
+
+
+def _db_data_version() -> int:
+    """读取数据库的 PRAGMA data_version（只访问 WAL 索引，不读数据页）"""
+    path = database.DB_PATH
+    with _watcher_lock:
+        conn = _watchers.get(path)
+        if conn is None:
+            conn = sqlite3.connect(path, check_same_thread=False)
+            _watchers[path] = conn
+        return conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def get_data_version() -> tuple:
+    """获取当前数据版本"""
+    return _data_version, database.DB_PATH, _db_data_version()
+
+
+def bump_data_version():
+    """数据发生变化后调用，使所有缓存失效"""
+    global _data_version
+    with _version_lock:
+        _data_version += 1
+
+
+def _make_key(value):
+    """把参数转换为可哈希的缓存键（list/dict/set 递归转为 tuple）"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _make_key(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_make_key(v) for v in value)
+    if isinstance(value, set):
+        return tuple(sorted(_make_key(v) for v in value))
+    return value
+
+
+def cached(maxsize: int = 128):
+    """
+    缓存装饰器，超过 maxsize 时淘汰最久未使用的结果
+    返回值是缓存内容的深拷贝，调用方修改不会影响缓存
+    """
+    def decorator(func):
+        entries = OrderedDict()
+        lock = threading.Lock()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (_make_key(args), _make_key(kwargs))
+            version = get_data_version()
+
+            with lock:
+                entry = entries.get(key)
+                if entry is not None and entry[0] == version:
+                    entries.move_to_end(key)
+                    return copy.deepcopy(entry[1])
+
+            result = func(*args, **kwargs)
+
+            with lock:
+                entries[key] = (version, result)
+                entries.move_to_end(key)
+                while len(entries) > maxsize:
+                    entries.popitem(last=False)
+
+            return copy.deepcopy(result)
+
+        def cache_clear():
+            with lock:
+                entries.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
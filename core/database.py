@@ -2,21 +2,85 @@
 
 import sqlite3
 import hashlib
+import threading
+from queue import LifoQueue, Empty, Full
 from datetime import datetime
 from contextlib import contextmanager
 
 DB_PATH = "data.db"
 
+# ============================================================
+# 连接池配置
+# ============================================================
+POOL_SIZE = 8                  # 每个数据库文件最多缓存的空闲连接数
+BUSY_TIMEOUT_MS = 5000         # 写锁等待时间，避免并发提交时报 "database is locked"
+CACHE_SIZE_KB = 16384          # 每个连接的页缓存（16MB）
+MMAP_SIZE = 256 * 1024 * 1024  # 内存映射读取上限（256MB）
+
+_pools: dict[str, LifoQueue] = {}
+_pools_lock = threading.Lock()
+
+# 已在本进程完成初始化的数据库文件
+_initialized_paths: set[str] = set()
+_init_lock = threading.Lock()
+
+
+def _open_connection(path: str) -> sqlite3.Connection:
+    """新建连接并一次性设置 PRAGMA"""
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+
+def _get_pool(path: str) -> LifoQueue:
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(path, LifoQueue(maxsize=POOL_SIZE))
+    return pool
+
 
 @contextmanager
 def get_connection():
-    """获取数据库连接的上下文管理器"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """
+    获取数据库连接的上下文管理器
+    连接来自进程内连接池，跨 Streamlit rerun 复用；退出时归还而不是关闭
+    """
+    pool = _get_pool(DB_PATH)
+    try:
+        conn = pool.get_nowait()
+    except Empty:
+        conn = _open_connection(DB_PATH)
+
     try:
         yield conn
     finally:
-        conn.close()
+        # 未提交的事务（如异常中断）不能带回池里
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            pool.put_nowait(conn)
+        except Full:
+            conn.close()
+
+
+def close_all_connections():
+    """关闭连接池中的所有空闲连接（切换数据库文件或测试时使用）"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        while True:
+            try:
+                pool.get_nowait().close()
+            except Empty:
+                break
 
 
 def hash_password(password: str) -> str:
@@ -25,55 +89,34 @@ def hash_password(password: str) -> str:
 
 
 def init_db():
-    """初始化数据库表"""
+    """初始化数据库：执行未应用的结构迁移，并在空库时写入初始用户"""
+    from core.migrations import LATEST_VERSION, get_schema_version, migrate
+
     with get_connection() as conn:
+        # 已是最新版本时跳过迁移
+        if get_schema_version(conn) < LATEST_VERSION:
+            migrate(conn)
         cursor = conn.cursor()
 
-        # 用户表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                role TEXT NOT NULL,
-                display_name TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # 需求表
-        cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS requests (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        title TEXT NOT NULL,
-                        description TEXT,
-                        request_type TEXT,
-                        research_scope TEXT,
-                        org_name TEXT,
-                        org_type TEXT,
-                        sales_id INTEGER NOT NULL,
-                        researcher_id INTEGER NOT NULL,
-                        is_confidential INTEGER DEFAULT 0,
-                        status TEXT DEFAULT 'pending',
-                        result_note TEXT,
-                        attachment_path TEXT,
-                        work_hours REAL DEFAULT 0,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        completed_at TIMESTAMP,
-                        FOREIGN KEY (sales_id) REFERENCES users(id),
-                        FOREIGN KEY (researcher_id) REFERENCES users(id)
-                    )
-                ''')
-
-        conn.commit()
-
         # 检查是否需要插入测试数据
         cursor.execute("SELECT COUNT(*) FROM users")
         if cursor.fetchone()[0] == 0:
             _insert_test_data(conn)
 
 
+def ensure_db():
+    """
+    每个进程只初始化一次数据库
+    模块在 Streamlit rerun 之间常驻，之后的调用不访问数据库
+    """
+    if DB_PATH in _initialized_paths:
+        return
+    with _init_lock:
+        if DB_PATH not in _initialized_paths:
+            init_db()
+            _initialized_paths.add(DB_PATH)
+
+
 def _insert_test_data(conn):
     """插入真实用户数据"""
     cursor = conn.cursor()
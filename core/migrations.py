@@ -0,0 +1,497 @@
+# core/migrations.py - 数据库结构版本迁移
+#
+# 每个迁移步骤有一个递增的版本号，已执行的版本记录在 schema_version 表中。
+# 新增表/索引时只追加新的迁移函数，不要修改已发布的步骤。
+#
+# 升级已有数据库：
+#     python -m core.migrations            # 升级 core.database.DB_PATH（data.db）
+#     python -m core.migrations other.db   # 升级指定文件
+
+import hashlib
+import mimetypes
+import os
+import sqlite3
+from datetime import datetime
+
+from config import TIMEZONE_OFFSET_HOURS
+from core.timeutils import sql_local_date
+
+MIGRATIONS = []
+
+
+def migration(version: int, description: str):
+    """注册迁移步骤的装饰器（步骤函数接收 cursor，可返回一条提示信息）"""
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return decorator
+
+
+# ============================================================
+# 迁移步骤
+# ============================================================
+
+@migration(1, "初始表结构")
+def _create_base_tables(cursor):
+    # 用户表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL,
+            display_name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # 需求表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS requests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            request_type TEXT,
+            research_scope TEXT,
+            org_name TEXT,
+            org_type TEXT,
+            sales_id INTEGER NOT NULL,
+            researcher_id INTEGER NOT NULL,
+            is_confidential INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'pending',
+            result_note TEXT,
+            attachment_path TEXT,
+            work_hours REAL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP,
+            FOREIGN KEY (sales_id) REFERENCES users(id),
+            FOREIGN KEY (researcher_id) REFERENCES users(id)
+        )
+    ''')
+
+
+# requests/users 查询索引（requests 表重建时需要重新创建）
+REQUEST_INDEXES = [
+    # 列表：按销售/研究员取需求，按创建时间倒序
+    "CREATE INDEX IF NOT EXISTS idx_requests_sales_created ON requests(sales_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_requests_researcher_created ON requests(researcher_id, created_at)",
+    # 研究员当日待办：researcher_id + status IN (...) + created_at
+    "CREATE INDEX IF NOT EXISTS idx_requests_researcher_status ON requests(researcher_id, status, created_at)",
+    # 公开需求 / 可见性判断
+    "CREATE INDEX IF NOT EXISTS idx_requests_confidential_created ON requests(is_confidential, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_requests_status_created ON requests(status, created_at)",
+    # 全量列表排序、总览统计的 created_at 区间
+    "CREATE INDEX IF NOT EXISTS idx_requests_created ON requests(created_at)",
+    # 各维度统计的 completed_at 区间
+    "CREATE INDEX IF NOT EXISTS idx_requests_completed ON requests(completed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_requests_researcher_completed ON requests(researcher_id, completed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_requests_org_completed ON requests(org_name, completed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_requests_type_completed ON requests(request_type, completed_at)",
+    # 研究员下拉等按角色取用户
+    "CREATE INDEX IF NOT EXISTS idx_users_role ON users(role)",
+]
+
+
+@migration(2, "requests/users 查询索引")
+def _create_request_indexes(cursor):
+    for sql in REQUEST_INDEXES:
+        cursor.execute(sql)
+    cursor.execute("ANALYZE")
+
+
+# 全文索引同步触发器（requests 表重建时需要重新创建）
+FTS_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS requests_fts_ai AFTER INSERT ON requests BEGIN
+        INSERT INTO requests_fts (rowid, title, description, org_name, result_note)
+        VALUES (new.id, new.title, new.description, new.org_name, new.result_note);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS requests_fts_ad AFTER DELETE ON requests BEGIN
+        INSERT INTO requests_fts (requests_fts, rowid, title, description, org_name, result_note)
+        VALUES ('delete', old.id, old.title, old.description, old.org_name, old.result_note);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS requests_fts_au
+    AFTER UPDATE OF title, description, org_name, result_note ON requests BEGIN
+        INSERT INTO requests_fts (requests_fts, rowid, title, description, org_name, result_note)
+        VALUES ('delete', old.id, old.title, old.description, old.org_name, old.result_note);
+        INSERT INTO requests_fts (rowid, title, description, org_name, result_note)
+        VALUES (new.id, new.title, new.description, new.org_name, new.result_note);
+    END
+    ''',
+]
+
+
+@migration(3, "requests 全文索引（FTS5 trigram）")
+def _create_request_fts(cursor):
+    # trigram 分词按 3 字滑窗切分，中文无需分词器；需要 SQLite 3.34+ 且编译了 FTS5，
+    # 不支持时跳过，搜索退化为 LIKE
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS requests_fts USING fts5(
+                title, description, org_name, result_note,
+                content='requests', content_rowid='id', tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        return
+
+    for sql in FTS_TRIGGERS:
+        cursor.execute(sql)
+    cursor.execute("INSERT INTO requests_fts (requests_fts) VALUES ('rebuild')")
+
+
+# 日汇总表维护触发器（requests 表重建时需要重新创建）
+# 维度: 日期 × 研究员 × 需求类型 × 机构 × 状态；NULL 维度值存为空字符串以便参与主键
+# 迁移 4 时 created_at 还是时间文本，直接取日期
+TEXT_DAY_EXPR = "COALESCE(date({row}.created_at), '')"
+# 迁移 5 之后 created_at 为 epoch 秒，按业务时区取日期
+LOCAL_DAY_EXPR = "COALESCE(" + sql_local_date("{row}.created_at") + ", '')"
+
+_ROLLUP_ADD = '''
+        INSERT INTO request_daily_rollup
+            (day, researcher_id, request_type, org_name, status, request_count, work_hours)
+        VALUES ({day}, new.researcher_id, IFNULL(new.request_type, ''), IFNULL(new.org_name, ''),
+                IFNULL(new.status, ''), 1, IFNULL(new.work_hours, 0))
+        ON CONFLICT (day, researcher_id, request_type, org_name, status) DO UPDATE SET
+            request_count = request_count + 1,
+            work_hours = work_hours + excluded.work_hours;
+'''
+
+_ROLLUP_REMOVE = '''
+        UPDATE request_daily_rollup
+        SET request_count = request_count - 1,
+            work_hours = work_hours - IFNULL(old.work_hours, 0)
+        WHERE day = {day} AND researcher_id = old.researcher_id
+          AND request_type = IFNULL(old.request_type, '') AND org_name = IFNULL(old.org_name, '')
+          AND status = IFNULL(old.status, '');
+        DELETE FROM request_daily_rollup
+        WHERE day = {day} AND researcher_id = old.researcher_id
+          AND request_type = IFNULL(old.request_type, '') AND org_name = IFNULL(old.org_name, '')
+          AND status = IFNULL(old.status, '') AND request_count <= 0;
+'''
+
+
+def rollup_triggers(day_expr: str = LOCAL_DAY_EXPR) -> list:
+    """生成日汇总表的维护触发器，day_expr 中的 {row} 替换为 new/old"""
+    add = _ROLLUP_ADD.format(day=day_expr.format(row='new'))
+    remove = _ROLLUP_REMOVE.format(day=day_expr.format(row='old'))
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS requests_rollup_ai AFTER INSERT ON requests BEGIN {add} END",
+        f"CREATE TRIGGER IF NOT EXISTS requests_rollup_ad AFTER DELETE ON requests BEGIN {remove} END",
+        f'''
+        CREATE TRIGGER IF NOT EXISTS requests_rollup_au
+        AFTER UPDATE OF created_at, researcher_id, request_type, org_name, status, work_hours ON requests
+        BEGIN {remove} {add} END
+        ''',
+    ]
+
+
+def rebuild_rollup(cursor, day_expr: str = LOCAL_DAY_EXPR):
+    """从 requests 全量重算日汇总表"""
+    cursor.execute("DELETE FROM request_daily_rollup")
+    cursor.execute(f'''
+        INSERT INTO request_daily_rollup
+            (day, researcher_id, request_type, org_name, status, request_count, work_hours)
+        SELECT {day_expr.format(row='requests')}, researcher_id, IFNULL(request_type, ''),
+               IFNULL(org_name, ''), IFNULL(status, ''), COUNT(*), SUM(IFNULL(work_hours, 0))
+        FROM requests
+        GROUP BY 1, 2, 3, 4, 5
+    ''')
+
+
+@migration(4, "需求日汇总表")
+def _create_daily_rollup(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS request_daily_rollup (
+            day TEXT NOT NULL,
+            researcher_id INTEGER NOT NULL,
+            request_type TEXT NOT NULL,
+            org_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            request_count INTEGER NOT NULL DEFAULT 0,
+            work_hours REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, researcher_id, request_type, org_name, status)
+        ) WITHOUT ROWID
+    ''')
+    for sql in rollup_triggers(TEXT_DAY_EXPR):
+        cursor.execute(sql)
+    rebuild_rollup(cursor, TEXT_DAY_EXPR)
+
+
+# 时间列统一为 epoch 秒
+# 旧数据的时间文本来源不同：CURRENT_TIMESTAMP 默认值是 UTC，
+# Python datetime.now() 与 insert_data.sql 导入的历史数据是业务时区本地时间
+_EPOCH_DEFAULT = "(CAST(strftime('%s', 'now') AS INTEGER))"
+
+
+def _utc_text_to_epoch(column: str) -> str:
+    return f"CAST(strftime('%s', {column}) AS INTEGER)"
+
+
+def _local_text_to_epoch(column: str) -> str:
+    return f"CAST(strftime('%s', {column}, '{-TIMEZONE_OFFSET_HOURS:+d} hours') AS INTEGER)"
+
+
+def _normalize_ts(column: str, utc_when: str = "0") -> str:
+    """已是整数的保持不变；文本按 utc_when 条件判断是 UTC 还是本地时间"""
+    return f'''
+        CASE
+            WHEN {column} IS NULL OR {column} = '' THEN NULL
+            WHEN typeof({column}) IN ('integer', 'real') THEN CAST({column} AS INTEGER)
+            WHEN {utc_when} THEN {_utc_text_to_epoch(column)}
+            ELSE {_local_text_to_epoch(column)}
+        END
+    '''
+
+
+@migration(5, "时间列统一为 epoch 秒")
+def _normalize_timestamps(cursor):
+    # CURRENT_TIMESTAMP 默认值（UTC）精确到秒；Python datetime 文本带微秒，
+    # insert_data.sql 导入的历史数据为 00:00:00 整点，这两类都是本地时间
+    def is_utc(column):
+        return f"instr({column}, '.') = 0 AND time({column}) != '00:00:00'"
+
+    cursor.execute(f'''
+        CREATE TABLE requests_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            request_type TEXT,
+            research_scope TEXT,
+            org_name TEXT,
+            org_type TEXT,
+            sales_id INTEGER NOT NULL,
+            researcher_id INTEGER NOT NULL,
+            is_confidential INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'pending',
+            result_note TEXT,
+            attachment_path TEXT,
+            work_hours REAL DEFAULT 0,
+            created_at INTEGER DEFAULT {_EPOCH_DEFAULT},
+            updated_at INTEGER DEFAULT {_EPOCH_DEFAULT},
+            completed_at INTEGER,
+            FOREIGN KEY (sales_id) REFERENCES users(id),
+            FOREIGN KEY (researcher_id) REFERENCES users(id)
+        )
+    ''')
+    cursor.execute(f'''
+        INSERT INTO requests_new
+            (id, title, description, request_type, research_scope, org_name, org_type,
+             sales_id, researcher_id, is_confidential, status, result_note, attachment_path,
+             work_hours, created_at, updated_at, completed_at)
+        SELECT id, title, description, request_type, research_scope, org_name, org_type,
+               sales_id, researcher_id, is_confidential, status, result_note, attachment_path,
+               work_hours,
+               {_normalize_ts('created_at', is_utc('created_at'))},
+               {_normalize_ts('updated_at', is_utc('updated_at'))},
+               {_normalize_ts('completed_at', is_utc('completed_at'))}
+        FROM requests
+    ''')
+    # 删除旧表会同时删除其索引和触发器，下面重新创建
+    cursor.execute("DROP TABLE requests")
+    cursor.execute("ALTER TABLE requests_new RENAME TO requests")
+
+    cursor.execute(f'''
+        CREATE TABLE users_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL,
+            display_name TEXT NOT NULL,
+            created_at INTEGER DEFAULT {_EPOCH_DEFAULT}
+        )
+    ''')
+    cursor.execute(f'''
+        INSERT INTO users_new (id, username, password, role, display_name, created_at)
+        SELECT id, username, password, role, display_name, {_normalize_ts('created_at', '1')}
+        FROM users
+    ''')
+    cursor.execute("DROP TABLE users")
+    cursor.execute("ALTER TABLE users_new RENAME TO users")
+
+    for sql in REQUEST_INDEXES:
+        cursor.execute(sql)
+
+    fts = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'requests_fts'"
+    ).fetchone()
+    if fts:
+        for sql in FTS_TRIGGERS:
+            cursor.execute(sql)
+
+    # 日汇总按业务时区的日期划分
+    for sql in rollup_triggers():
+        cursor.execute(sql)
+    rebuild_rollup(cursor)
+
+    cursor.execute("ANALYZE")
+
+
+@migration(6, "附件元数据表")
+def _create_attachments(cursor):
+    # 附件内容按 SHA-256 存放在 UPLOAD_DIR/objects 下，相同内容只存一份；
+    # 每次上传一行元数据，多行可以指向同一个 sha256
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS attachments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id INTEGER NOT NULL,
+            file_name TEXT NOT NULL,
+            mime TEXT,
+            size INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            storage_path TEXT NOT NULL,
+            uploaded_by INTEGER,
+            uploaded_at INTEGER DEFAULT {_EPOCH_DEFAULT},
+            FOREIGN KEY (request_id) REFERENCES requests(id),
+            FOREIGN KEY (uploaded_by) REFERENCES users(id)
+        )
+    ''')
+    # 去重查找、按存储路径反查
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attachments_sha256 ON attachments(sha256)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attachments_storage_path ON attachments(storage_path)")
+
+
+def _file_sha256(path: str) -> tuple[str, int]:
+    """分块计算文件的 (sha256, 字节数)"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+@migration(7, "附件按需求索引，回填旧 attachment_path")
+def _index_attachments(cursor):
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_attachments_request ON attachments(request_id, id)"
+    )
+
+    # 旧版本每个需求只有 requests.attachment_path 一个文件（uploads/{id}_{原文件名}）。
+    # 文件保留在原位置，只补元数据；文件已不存在的跳过。
+    # 路径是相对应用目录（即数据库所在目录）保存的，按数据库目录解析，
+    # 这样从其他目录执行 python -m core.migrations <db> 也能找到文件
+    db_file = next((row[2] for row in cursor.execute("PRAGMA database_list") if row[1] == "main"), "")
+    base_dir = os.path.dirname(os.path.abspath(db_file)) if db_file else os.getcwd()
+
+    rows = cursor.execute('''
+        SELECT r.id, r.attachment_path, COALESCE(r.completed_at, r.updated_at) AS uploaded_at
+        FROM requests r
+        WHERE r.attachment_path IS NOT NULL AND r.attachment_path != ''
+          AND NOT EXISTS (
+              SELECT 1 FROM attachments a
+              WHERE a.request_id = r.id AND a.storage_path = r.attachment_path
+          )
+    ''').fetchall()
+    skipped = 0
+    for request_id, path, uploaded_at in rows:
+        file_path = os.path.join(base_dir, path)
+        if not os.path.isfile(file_path):
+            skipped += 1
+            continue
+        sha256, size = _file_sha256(file_path)
+        file_name = os.path.basename(path)
+        prefix = f"{request_id}_"
+        if file_name.startswith(prefix):
+            file_name = file_name[len(prefix):]
+        mime = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+        cursor.execute('''
+            INSERT INTO attachments (request_id, file_name, mime, size, sha256, storage_path, uploaded_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (request_id, file_name, mime, size, sha256, path, uploaded_at))
+
+    if skipped:
+        return f"{skipped} 个旧附件文件不存在（相对 {base_dir}），未回填"
+
+
+# ============================================================
+# 执行
+# ============================================================
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """获取当前数据库的结构版本，未初始化返回 0"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if not exists:
+        return 0
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def migrate(conn: sqlite3.Connection, notes: list = None) -> list:
+    """
+    执行所有未应用的迁移步骤
+    每个步骤在独立事务中执行，失败时回滚且不记录版本
+    notes: 传入列表时收集步骤返回的提示信息 (版本号, 提示)，由调用方决定是否输出
+    返回: 本次应用的版本号列表
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+    applied = []
+
+    for version, description, func in MIGRATIONS:
+        if version <= get_schema_version(conn):
+            continue
+
+        cursor = conn.cursor()
+        try:
+            # 多个进程可能同时启动并迁移同一个数据库：
+            # 先取得写锁，再在事务内重新读取版本，已被其他进程应用的步骤跳过
+            cursor.execute("BEGIN IMMEDIATE")
+            if version <= get_schema_version(conn):
+                conn.rollback()
+                continue
+            note = func(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, datetime.now())
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+        if note and notes is not None:
+            notes.append((version, note))
+
+    return applied
+
+
+if __name__ == "__main__":
+    import sys
+    from core.database import DB_PATH
+
+    path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    conn = sqlite3.connect(path)
+    notes = []
+    try:
+        before = get_schema_version(conn)
+        done = migrate(conn, notes)
+    finally:
+        conn.close()
+
+    for version, note in notes:
+        print(f"迁移 {version}: {note}")
+
+    if done:
+        print(f"{path}: 版本 {before} -> {done[-1]}（应用 {len(done)} 个迁移）")
+    else:
+        print(f"{path}: 已是最新版本 {before}")
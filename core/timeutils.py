@@ -0,0 +1,74 @@
+# core/timeutils.py - 时间戳工具
+#
+# 数据库中的时间列统一存储为整数 epoch 秒（与时区无关），
+# "今天"、"本月"等按业务时区（config.TIMEZONE_OFFSET_HOURS）划分。
+# 页面传入的无时区 datetime/date 一律视为业务时区时间。
+
+from datetime import date, datetime, time, timedelta, timezone
+from config import TIMEZONE_OFFSET_HOURS
+
+BUSINESS_TZ = timezone(timedelta(hours=TIMEZONE_OFFSET_HOURS))
+
+
+def now_ts() -> int:
+    """当前时间的 epoch 秒"""
+    return int(datetime.now(timezone.utc).timestamp())
+
+
+def now_local() -> datetime:
+    """业务时区的当前时间（无时区信息）"""
+    return datetime.now(BUSINESS_TZ).replace(tzinfo=None)
+
+
+def to_ts(value) -> int | None:
+    """
+    转换为 epoch 秒
+    支持: None / int / float / datetime（无时区视为业务时区）/ date（当天 0 点）/
+          'YYYY-MM-DD[ HH:MM:SS]' 字符串（业务时区）
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=BUSINESS_TZ)
+    return int(value.timestamp())
+
+
+def from_ts(ts) -> datetime | None:
+    """epoch 秒转换为业务时区时间（无时区信息）"""
+    if ts is None or ts == '':
+        return None
+    return datetime.fromtimestamp(int(ts), BUSINESS_TZ).replace(tzinfo=None)
+
+
+def format_ts(ts, fmt: str = "%Y-%m-%d %H:%M:%S", default: str = "-") -> str:
+    """格式化 epoch 秒用于显示"""
+    dt = from_ts(ts)
+    return dt.strftime(fmt) if dt else default
+
+
+def day_range_ts(start_day: date, end_day: date = None) -> tuple[int, int]:
+    """日期区间（闭区间）对应的 epoch 秒范围: [start 0 点, end 23:59:59]"""
+    end_day = end_day or start_day
+    return to_ts(start_day), to_ts(end_day + timedelta(days=1)) - 1
+
+
+def _sql_local_args(column: str, modifiers: tuple) -> str:
+    """SQLite 日期函数参数：epoch 秒列换算到业务时区，再依次应用 modifiers"""
+    args = f"{column}, 'unixepoch', '{TIMEZONE_OFFSET_HOURS:+d} hours'"
+    return args + "".join(f", '{m}'" for m in modifiers)
+
+
+def sql_local_date(column: str, *modifiers: str) -> str:
+    """SQL 表达式：epoch 秒列在业务时区下的日期 'YYYY-MM-DD'（可追加 'weekday 0' 等修饰符）"""
+    return f"date({_sql_local_args(column, modifiers)})"
+
+
+def sql_local_strftime(fmt: str, column: str) -> str:
+    """SQL 表达式：epoch 秒列在业务时区下按 fmt 格式化"""
+    return f"strftime('{fmt}', {_sql_local_args(column, ())})"
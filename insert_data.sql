@@ -1,5 +1,6 @@
 -- 批量插入历史需求数据
 -- 注意：这里使用子查询 (SELECT id FROM users ...) 自动根据人名查找对应的 ID
+-- 时间列存 epoch 秒：strftime('%s', 本地时间, '-8 hours') 把北京时间转换为 epoch 秒
 
 INSERT INTO requests (
     title, description, request_type, research_scope, org_name, org_type,
@@ -8,7 +9,7 @@ INSERT INTO requests (
     '交银理财周度权益基金筛选', '', '基金筛选', '权益', '交银理财', '理财',
     (SELECT id FROM users WHERE display_name = '李迎圣'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-03 00:00:00', '2025-11-03 00:00:00', 1.0, 'completed', 0
+    strftime('%s', '2025-11-03 00:00:00', '-8 hours'), strftime('%s', '2025-11-03 00:00:00', '-8 hours'), 1.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -18,7 +19,7 @@ INSERT INTO requests (
     '月度债市股市点评', '', '报告|定制', '资产配置', '融通财险', '保险',
     (SELECT id FROM users WHERE display_name = '李迎圣'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-03 00:00:00', '2025-11-03 00:00:00', 1.0, 'completed', 0
+    strftime('%s', '2025-11-03 00:00:00', '-8 hours'), strftime('%s', '2025-11-03 00:00:00', '-8 hours'), 1.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -28,7 +29,7 @@ INSERT INTO requests (
     '上海银行周报', '', '报告|定制', '资产配置', '上海银行', '银行自营',
     (SELECT id FROM users WHERE display_name = '李迎圣'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-03 00:00:00', '2025-11-03 00:00:00', 1.0, 'completed', 0
+    strftime('%s', '2025-11-03 00:00:00', '-8 hours'), strftime('%s', '2025-11-03 00:00:00', '-8 hours'), 1.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -38,7 +39,7 @@ INSERT INTO requests (
     '中银理财市场观点周报', '', '报告|定制', '资产配置', '中银理财', '理财',
     (SELECT id FROM users WHERE display_name = '孙宇萌'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-03 00:00:00', '2025-11-03 00:00:00', 1.0, 'completed', 0
+    strftime('%s', '2025-11-03 00:00:00', '-8 hours'), strftime('%s', '2025-11-03 00:00:00', '-8 hours'), 1.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -48,7 +49,7 @@ INSERT INTO requests (
     '固收+基金客户模拟组合列表底稿修改（DS）', '', '生产化|提效', '固收＋', '东方证券', '券商',
     (SELECT id FROM users WHERE display_name = '刘仟一'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-04 00:00:00', '2025-11-04 00:00:00', 1.0, 'completed', 0
+    strftime('%s', '2025-11-04 00:00:00', '-8 hours'), strftime('%s', '2025-11-04 00:00:00', '-8 hours'), 1.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -58,7 +59,7 @@ INSERT INTO requests (
     '公募fof、商品型基金、互认基金、QDII基金及含ABS高的不含权基金筛选', '', '基金筛选', '纯债', '英大资本', '保险',
     (SELECT id FROM users WHERE display_name = '孙宇萌'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-04 00:00:00', '2025-11-04 00:00:00', 2.5, 'completed', 0
+    strftime('%s', '2025-11-04 00:00:00', '-8 hours'), strftime('%s', '2025-11-04 00:00:00', '-8 hours'), 2.5, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -68,7 +69,7 @@ INSERT INTO requests (
     '固收+标签及数据更新', '', '基金筛选', '固收＋', '中海信托', '信托',
     (SELECT id FROM users WHERE display_name = '姚芳'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-05 00:00:00', '2025-11-05 00:00:00', 1.0, 'completed', 0
+    strftime('%s', '2025-11-05 00:00:00', '-8 hours'), strftime('%s', '2025-11-05 00:00:00', '-8 hours'), 1.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -78,7 +79,7 @@ INSERT INTO requests (
     'QDII权益型基金筛选', '', '基金筛选', '权益', '中信信托', '信托',
     (SELECT id FROM users WHERE display_name = '吴泽航'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-05 00:00:00', '2025-11-05 00:00:00', 1.0, 'completed', 0
+    strftime('%s', '2025-11-05 00:00:00', '-8 hours'), strftime('%s', '2025-11-05 00:00:00', '-8 hours'), 1.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -88,7 +89,7 @@ INSERT INTO requests (
     '40只基金入库报告信息整理', '', '报告|定制', '固收＋', '海通资管', '券商',
     (SELECT id FROM users WHERE display_name = '段颖'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-06 00:00:00', '2025-11-06 00:00:00', 2.0, 'completed', 0
+    strftime('%s', '2025-11-06 00:00:00', '-8 hours'), strftime('%s', '2025-11-06 00:00:00', '-8 hours'), 2.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -98,7 +99,7 @@ INSERT INTO requests (
     '10月基金经理市场观点', '', '报告|定制', '资产配置', '恒丰理财', '理财',
     (SELECT id FROM users WHERE display_name = '刘仟一'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-06 00:00:00', '2025-11-06 00:00:00', 0.5, 'completed', 0
+    strftime('%s', '2025-11-06 00:00:00', '-8 hours'), strftime('%s', '2025-11-06 00:00:00', '-8 hours'), 0.5, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -108,7 +109,7 @@ INSERT INTO requests (
     '2010年以来每年跑赢基准的纯债、固收+及权益基金筛选及统计', '', '报告|定制', '权益', '泰康资产', '保险',
     (SELECT id FROM users WHERE display_name = '孙宇萌'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-05 00:00:00', '2025-11-06 00:00:00', 5.0, 'completed', 0
+    strftime('%s', '2025-11-05 00:00:00', '-8 hours'), strftime('%s', '2025-11-06 00:00:00', '-8 hours'), 5.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -118,7 +119,7 @@ INSERT INTO requests (
     '月度大模型市场观点整理', '', '报告|定制', '资产配置', '泰康资产', '保险',
     (SELECT id FROM users WHERE display_name = '孙宇萌'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-06 00:00:00', '2025-11-06 00:00:00', 2.0, 'completed', 0
+    strftime('%s', '2025-11-06 00:00:00', '-8 hours'), strftime('%s', '2025-11-06 00:00:00', '-8 hours'), 2.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -128,7 +129,7 @@ INSERT INTO requests (
     '10月基金经理市场观点', '', '报告|定制', '资产配置', '中加fof', 'FOF',
     (SELECT id FROM users WHERE display_name = '李典哲'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-06 00:00:00', '2025-11-06 00:00:00', 0.5, 'completed', 0
+    strftime('%s', '2025-11-06 00:00:00', '-8 hours'), strftime('%s', '2025-11-06 00:00:00', '-8 hours'), 0.5, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -138,7 +139,7 @@ INSERT INTO requests (
     '10月基金经理市场观点', '', '报告|定制', '资产配置', '中信信托', '信托',
     (SELECT id FROM users WHERE display_name = '钱定坤'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-06 00:00:00', '2025-11-06 00:00:00', 0.5, 'completed', 0
+    strftime('%s', '2025-11-06 00:00:00', '-8 hours'), strftime('%s', '2025-11-06 00:00:00', '-8 hours'), 0.5, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -148,7 +149,7 @@ INSERT INTO requests (
     '基金入库报告信息整理', '', '报告|定制', '纯债', '国泰海通', '券商',
     (SELECT id FROM users WHERE display_name = '段颖'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-07 00:00:00', '2025-11-07 00:00:00', 2.5, 'completed', 0
+    strftime('%s', '2025-11-07 00:00:00', '-8 hours'), strftime('%s', '2025-11-07 00:00:00', '-8 hours'), 2.5, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -158,7 +159,7 @@ INSERT INTO requests (
     '交银理财周度权益基金筛选', '', '基金筛选', '权益', '交银理财', '理财',
     (SELECT id FROM users WHERE display_name = '李迎圣'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-10 00:00:00', '2025-11-10 00:00:00', 1.0, 'completed', 0
+    strftime('%s', '2025-11-10 00:00:00', '-8 hours'), strftime('%s', '2025-11-10 00:00:00', '-8 hours'), 1.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -168,7 +169,7 @@ INSERT INTO requests (
     '上海银行周报', '', '报告|定制', '资产配置', '上海银行', '银行自营',
     (SELECT id FROM users WHERE display_name = '李迎圣'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-10 00:00:00', '2025-11-10 00:00:00', 1.0, 'completed', 0
+    strftime('%s', '2025-11-10 00:00:00', '-8 hours'), strftime('%s', '2025-11-10 00:00:00', '-8 hours'), 1.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -178,7 +179,7 @@ INSERT INTO requests (
     '微盘股策略基金筛选', '', '基金筛选', '权益', '中信信托', '信托',
     (SELECT id FROM users WHERE display_name = '吴泽航'),
     (SELECT id FROM users WHERE display_name = '陈熙雨'),
-    '2025-11-10 00:00:00', '2025-11-10 00:00:00', 2.0, 'completed', 0
+    strftime('%s', '2025-11-10 00:00:00', '-8 hours'), strftime('%s', '2025-11-10 00:00:00', '-8 hours'), 2.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -188,7 +189,7 @@ INSERT INTO requests (
     '量化固收+筛选', '', '基金筛选', '固收＋', '银河证券', '券商',
     (SELECT id FROM users WHERE display_name = '钱一冰'),
     (SELECT id FROM users WHERE display_name = '刘洋'),
-    '2025-11-03 00:00:00', '2025-11-03 00:00:00', 2.0, 'completed', 0
+    strftime('%s', '2025-11-03 00:00:00', '-8 hours'), strftime('%s', '2025-11-03 00:00:00', '-8 hours'), 2.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -198,7 +199,7 @@ INSERT INTO requests (
     '一二级债基筛选', '', '基金筛选', '固收＋', '中信证券', '券商',
     (SELECT id FROM users WHERE display_name = '郭力嘉'),
     (SELECT id FROM users WHERE display_name = '刘洋'),
-    '2025-11-03 00:00:00', '2025-11-03 00:00:00', 1.0, 'completed', 0
+    strftime('%s', '2025-11-03 00:00:00', '-8 hours'), strftime('%s', '2025-11-03 00:00:00', '-8 hours'), 1.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -208,7 +209,7 @@ INSERT INTO requests (
     '可转债基金整理', '', '基金筛选', '固收＋', '五矿固收', '券商',
     (SELECT id FROM users WHERE display_name = '聂慧敏'),
     (SELECT id FROM users WHERE display_name = '刘洋'),
-    '2025-11-04 00:00:00', '2025-11-04 00:00:00', 1.0, 'completed', 0
+    strftime('%s', '2025-11-04 00:00:00', '-8 hours'), strftime('%s', '2025-11-04 00:00:00', '-8 hours'), 1.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -218,7 +219,7 @@ INSERT INTO requests (
     '摊余成本法债基策略及收益测算', '', '知识沉淀', '纯债', '泉州银行', '银行自营',
     (SELECT id FROM users WHERE display_name = '胡奇洋'),
     (SELECT id FROM users WHERE display_name = '刘洋'),
-    '2025-11-06 00:00:00', '2025-11-06 00:00:00', 3.5, 'completed', 0
+    strftime('%s', '2025-11-06 00:00:00', '-8 hours'), strftime('%s', '2025-11-06 00:00:00', '-8 hours'), 3.5, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -228,7 +229,7 @@ INSERT INTO requests (
     '新能源固收+筛选', '', '基金筛选', '固收＋', '中海信托', '信托',
     (SELECT id FROM users WHERE display_name = '姚芳'),
     (SELECT id FROM users WHERE display_name = '刘洋'),
-    '2025-11-06 00:00:00', '2025-11-06 00:00:00', 2.0, 'completed', 0
+    strftime('%s', '2025-11-06 00:00:00', '-8 hours'), strftime('%s', '2025-11-06 00:00:00', '-8 hours'), 2.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -238,7 +239,7 @@ INSERT INTO requests (
     'Q3行业标签更新及筛选', '', '基金筛选', '固收＋', '中信证券', '券商',
     (SELECT id FROM users WHERE display_name = '郭力嘉'),
     (SELECT id FROM users WHERE display_name = '刘洋'),
-    '2025-11-06 00:00:00', '2025-11-06 00:00:00', 8.0, 'completed', 0
+    strftime('%s', '2025-11-06 00:00:00', '-8 hours'), strftime('%s', '2025-11-06 00:00:00', '-8 hours'), 8.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -248,7 +249,7 @@ INSERT INTO requests (
     '一二级债基筛选', '', '基金筛选', '固收＋', '中信证券', '券商',
     (SELECT id FROM users WHERE display_name = '郭力嘉'),
     (SELECT id FROM users WHERE display_name = '刘洋'),
-    '2025-11-10 00:00:00', '2025-11-10 00:00:00', 1.0, 'completed', 0
+    strftime('%s', '2025-11-10 00:00:00', '-8 hours'), strftime('%s', '2025-11-10 00:00:00', '-8 hours'), 1.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -258,7 +259,7 @@ INSERT INTO requests (
     '二级债基新能源标签及占比', '', '基金筛选', '固收＋', '中海信托', '信托',
     (SELECT id FROM users WHERE display_name = '姚芳'),
     (SELECT id FROM users WHERE display_name = '刘洋'),
-    '2025-11-11 00:00:00', '2025-11-11 00:00:00', 1.0, 'completed', 0
+    strftime('%s', '2025-11-11 00:00:00', '-8 hours'), strftime('%s', '2025-11-11 00:00:00', '-8 hours'), 1.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -268,7 +269,7 @@ INSERT INTO requests (
     'Q3行业标签更新及筛选', '', '基金筛选', '固收＋', '中信证券', '券商',
     (SELECT id FROM users WHERE display_name = '郭力嘉'),
     (SELECT id FROM users WHERE display_name = '刘洋'),
-    '2025-11-07 00:00:00', '2025-11-11 00:00:00', 13.0, 'completed', 0
+    strftime('%s', '2025-11-07 00:00:00', '-8 hours'), strftime('%s', '2025-11-11 00:00:00', '-8 hours'), 13.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -278,7 +279,7 @@ INSERT INTO requests (
     '贵州银行周报', '', '报告|定制', '资产配置', '贵州银行', '银行资管',
     (SELECT id FROM users WHERE display_name = '金成俊'),
     (SELECT id FROM users WHERE display_name = '朱浩天'),
-    '2025-11-03 00:00:00', '2025-11-03 00:00:00', 0.0, 'completed', 0
+    strftime('%s', '2025-11-03 00:00:00', '-8 hours'), strftime('%s', '2025-11-03 00:00:00', '-8 hours'), 0.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -288,7 +289,7 @@ INSERT INTO requests (
     '每年都跑赢沪深300且每年的回撤都小于沪深300的基金经理筛选', '', '基金筛选', '量化', '人保资产', '保险',
     (SELECT id FROM users WHERE display_name = '胡慧慧'),
     (SELECT id FROM users WHERE display_name = '朱浩天'),
-    '2025-11-03 00:00:00', '2025-11-03 00:00:00', 0.0, 'completed', 0
+    strftime('%s', '2025-11-03 00:00:00', '-8 hours'), strftime('%s', '2025-11-03 00:00:00', '-8 hours'), 0.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -298,7 +299,7 @@ INSERT INTO requests (
     '主动中低频轮动基金筛选', '', '报告|定制', '量化', '客户不详43', '其他',
     (SELECT id FROM users WHERE display_name = '段颖'),
     (SELECT id FROM users WHERE display_name = '朱浩天'),
-    '2025-11-03 00:00:00', '2025-11-03 00:00:00', 0.0, 'completed', 0
+    strftime('%s', '2025-11-03 00:00:00', '-8 hours'), strftime('%s', '2025-11-03 00:00:00', '-8 hours'), 0.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -308,7 +309,7 @@ INSERT INTO requests (
     '机构申赎分位数报表+图片自动化开发', '', '生产化|提效', '量化', '中信银行', '银行资管',
     (SELECT id FROM users WHERE display_name = '钱一冰'),
     (SELECT id FROM users WHERE display_name = '朱浩天'),
-    '2025-11-04 00:00:00', '2025-11-04 00:00:00', 0.0, 'completed', 0
+    strftime('%s', '2025-11-04 00:00:00', '-8 hours'), strftime('%s', '2025-11-04 00:00:00', '-8 hours'), 0.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -318,7 +319,7 @@ INSERT INTO requests (
     '20年以来5年都跑赢沪深300且每年的回撤都小于沪深300的基金筛选', '', '基金筛选', '量化', '人保资产', '保险',
     (SELECT id FROM users WHERE display_name = '胡慧慧'),
     (SELECT id FROM users WHERE display_name = '朱浩天'),
-    '2025-11-05 00:00:00', '2025-11-05 00:00:00', 0.0, 'completed', 0
+    strftime('%s', '2025-11-05 00:00:00', '-8 hours'), strftime('%s', '2025-11-05 00:00:00', '-8 hours'), 0.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -328,7 +329,7 @@ INSERT INTO requests (
     '量化策略基金筛选推荐', '', '基金筛选', '量化', '首创证券', '券商',
     (SELECT id FROM users WHERE display_name = '孙宇萌'),
     (SELECT id FROM users WHERE display_name = '朱浩天'),
-    '2025-11-05 00:00:00', '2025-11-05 00:00:00', 0.0, 'completed', 0
+    strftime('%s', '2025-11-05 00:00:00', '-8 hours'), strftime('%s', '2025-11-05 00:00:00', '-8 hours'), 0.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -338,7 +339,7 @@ INSERT INTO requests (
     '量化策略研究报告整理', '', '知识沉淀', '量化', '首创证券', '券商',
     (SELECT id FROM users WHERE display_name = '孙宇萌'),
     (SELECT id FROM users WHERE display_name = '朱浩天'),
-    '2025-11-05 00:00:00', '2025-11-05 00:00:00', 0.0, 'completed', 0
+    strftime('%s', '2025-11-05 00:00:00', '-8 hours'), strftime('%s', '2025-11-05 00:00:00', '-8 hours'), 0.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -348,7 +349,7 @@ INSERT INTO requests (
     '昨天净值创今年来新高的权益基金', '', '基金筛选', '权益', '兴银理财', '理财',
     (SELECT id FROM users WHERE display_name = '刘仟一'),
     (SELECT id FROM users WHERE display_name = '朱浩天'),
-    '2025-11-05 00:00:00', '2025-11-05 00:00:00', 0.0, 'completed', 0
+    strftime('%s', '2025-11-05 00:00:00', '-8 hours'), strftime('%s', '2025-11-05 00:00:00', '-8 hours'), 0.0, 'completed', 0
 );
 
 INSERT INTO requests (
@@ -358,5 +359,5 @@ INSERT INTO requests (
     '权益基金产品报告', '', '报告|定制', '量化', '客户不详233', '其他',
     (SELECT id FROM users WHERE display_name = '吴泽航'),
     (SELECT id FROM users WHERE display_name = '朱浩天'),
-    '2025-11-06 00:00:00', '2025-11-06 00:00:00', 0.0, 'completed', 0
+    strftime('%s', '2025-11-06 00:00:00', '-8 hours'), strftime('%s', '2025-11-06 00:00:00', '-8 hours'), 0.0, 'completed', 0
 );
\ No newline at end of file
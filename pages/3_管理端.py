@@ -7,6 +7,8 @@ from datetime import datetime
 st.set_page_config(page_title="管理端", page_icon="📊", layout="wide")
 
 from core.auth import require_role
+from core.database import ensure_db
+from core.timeutils import day_range_ts, format_ts
 from components.admin_views import (
     render_multi_period_researcher_table,
     render_multi_period_request_type_table,
@@ -16,12 +18,25 @@ from components.admin_views import (
     render_request_type_table,
     render_org_table,
     render_bar_chart,
-    export_to_excel
+    render_trend_chart,
+    render_aging_chart,
+    render_request_item_simple,
+    render_excel_download
 )
 from components.filters import render_keyword_filter
 from components.forms import render_user_form
-from services.request_service import get_all_requests, reassign_researcher, toggle_confidential
-from services.user_service import get_all_users, get_users_by_role, create_user, delete_user
+from components.tables import render_paged_request_list, render_request_content
+from components.navigation import render_tab_nav
+from services.request_service import (
+    get_all_requests_page,
+    iter_filtered_requests,
+    get_public_requests_page,
+    get_request_by_id,
+    reassign_researcher,
+    toggle_confidential
+)
+from services.user_service import create_user, delete_user
+from services.page_context import PageDataContext
 from services.stats_service import (
     get_overview_stats,
     get_stats_by_researcher,
@@ -31,23 +46,120 @@ from services.stats_service import (
     get_multi_period_stats_by_request_type,
     get_researcher_detail_stats,
     get_request_type_detail_stats,
-    get_org_detail_stats
+    get_org_detail_stats,
+    get_trend_series,
+    get_turnaround_percentiles,
+    get_open_request_aging
 )
 from config import get_role_display, REQUEST_TYPES, RESEARCH_SCOPES, get_status_display
 
+ensure_db()
+
 user = require_role(['admin'])
 
 st.title("📊 管理端")
 st.caption(f"当前用户: {user['display_name']}")
 
-tab1, tab2, tab3, tab4 = st.tabs([
-    "📈 工作量看板", "📊 多维分析", "📥 数据导出", "⚙️ 系统管理"
-])
+# 本次运行内共享的基础数据（研究员、机构、用户列表），每类只查询一次
+ctx = PageDataContext()
+
+
+@st.fragment
+def render_reassign_controls(request_id: int, researcher_options):
+    """
+    单个需求的重派/保密设置（局部重跑）
+    选择研究员、切换保密状态时只重跑本函数并重新读取这一条需求
+    """
+    req = get_request_by_id(request_id)
+    if not req:
+        return
+
+    st.divider()
+
+    col_a, col_b, col_c, col_d = st.columns([2, 1, 2, 1])
+
+    with col_a:
+        current_index = 0
+        if req['researcher_name'] in researcher_options:
+            current_index = list(researcher_options.keys()).index(req['researcher_name'])
+
+        new_researcher = st.selectbox(
+            "重派给",
+            list(researcher_options.keys()),
+            index=current_index,
+            key=f"reassign_{req['id']}"
+        )
+
+    with col_b:
+        if st.button("确认重派", key=f"confirm_reassign_{req['id']}"):
+            new_id = researcher_options[new_researcher]
+            if new_id != req['researcher_id']:
+                reassign_researcher(req['id'], new_id)
+                st.success(f"已重派给 {new_researcher}")
+                st.rerun()
+
+    with col_c:
+        current_conf = req.get('is_confidential', 0)
+        new_conf_status = st.radio(
+            "保密状态",
+            ["公开", "保密"],
+            index=1 if current_conf else 0,
+            key=f"conf_{req['id']}",
+            horizontal=True
+        )
+
+    with col_d:
+        if st.button("确认修改", key=f"confirm_conf_{req['id']}"):
+            new_is_conf = (new_conf_status == "保密")
+            if new_is_conf != bool(current_conf):
+                toggle_confidential(req['id'], new_is_conf)
+                st.success(f"已修改为{new_conf_status}")
+                st.rerun()
+
+
+def render_reassign_item(req: dict):
+    """重派管理列表项：基本信息 + 重派/保密设置"""
+    confidential_badge = "🔒 " if req.get('is_confidential') else "🔓 "
+    status_display = get_status_display(req['status'])
+
+    with st.expander(f"{confidential_badge}**{req['title']}** - {status_display}"):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.write(f"**销售:** {req['sales_name']}")
+            st.write(f"**需求类型:** {req.get('request_type', '-')}")
+
+        with col2:
+            st.write(f"**研究员:** {req['researcher_name']}")
+            st.write(f"**机构:** {req.get('org_name', '-')}")
+
+        render_reassign_controls(req['id'], ctx.researcher_options)
+
+
+def render_admin_public_item(req: dict):
+    """公开需求列表项"""
+    status_display = get_status_display(req['status'])
+
+    with st.expander(f"**{req['title']}** - {status_display}"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write(f"**需求类型:** {req.get('request_type') or '-'}")
+            st.write(f"**研究员:** {req.get('researcher_name', '-')}")
+        with col2:
+            st.write(f"**销售:** {req.get('sales_name', '-')}")
+            st.write(f"**创建时间:** {format_ts(req.get('created_at'))}")
+
+        render_request_content(req, key_prefix="admin_pub")
+
+
+# 只执行当前标签页（及二级标签页）的代码，未选中的标签不查询数据
+TAB_WORKLOAD, TAB_ANALYSIS, TAB_EXPORT, TAB_SYSTEM = "📈 工作量看板", "📊 多维分析", "📥 数据导出", "⚙️ 系统管理"
+active_tab = render_tab_nav([TAB_WORKLOAD, TAB_ANALYSIS, TAB_EXPORT, TAB_SYSTEM], key="admin_tab")
 
 # ============================================================
 # Tab 1: 工作量看板
 # ============================================================
-with tab1:
+if active_tab == TAB_WORKLOAD:
     st.subheader("工作量统计看板")
 
     st.divider()
@@ -65,13 +177,14 @@ with tab1:
 # ============================================================
 # Tab 2: 多维分析（二级标签）
 # ============================================================
-with tab2:
-    sub_tab1, sub_tab2, sub_tab3, sub_tab4 = st.tabs([
-        "📊 统计看板", "👤 研究员视角", "📁 需求类型视角", "🏢 客户视角"
-    ])
+elif active_tab == TAB_ANALYSIS:
+    sub_tab = render_tab_nav(
+        ["📊 统计看板", "👤 研究员视角", "📁 需求类型视角", "🏢 客户视角", "⏱️ 周期分析"],
+        key="admin_analysis_tab"
+    )
 
     # 统计看板
-    with sub_tab1:
+    if sub_tab == "📊 统计看板":
         st.subheader("数据总览")
 
         start_date, end_date = render_time_selector("overview_")
@@ -83,6 +196,38 @@ with tab2:
 
         st.divider()
 
+        st.subheader("趋势")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            trend_bucket = st.selectbox(
+                "粒度", ["day", "week", "month"],
+                format_func=lambda x: {"day": "按日", "week": "按周", "month": "按月"}[x],
+                key="trend_bucket"
+            )
+        with col2:
+            trend_split = st.selectbox(
+                "拆分", [None, "researcher", "request_type", "status"],
+                format_func=lambda x: {None: "不拆分", "researcher": "研究员",
+                                       "request_type": "需求类型", "status": "状态"}[x],
+                key="trend_split"
+            )
+        with col3:
+            trend_measure = st.selectbox(
+                "指标", ["total", "total_hours"],
+                format_func=lambda x: {"total": "需求数", "total_hours": "工时"}[x],
+                key="trend_measure"
+            )
+
+        trend = get_trend_series(trend_bucket, start_date, end_date, split_by=trend_split)
+        if trend_split == "status":
+            for row in trend:
+                row['status'] = get_status_display(row['status'])
+        color_field = {"researcher": "researcher_name"}.get(trend_split, trend_split)
+        render_trend_chart(trend, trend_measure, "需求数趋势" if trend_measure == "total" else "工时趋势",
+                           color_field=color_field, key="overview_trend")
+
+        st.divider()
+
         col1, col2 = st.columns(2)
 
         with col1:
@@ -102,11 +247,10 @@ with tab2:
         render_org_table(org_stats)
 
     # 研究员视角
-    with sub_tab2:
+    elif sub_tab == "👤 研究员视角":
         st.subheader("👤 研究员详情")
 
-        researchers = get_users_by_role('researcher')
-        researcher_options = {r['display_name']: r['id'] for r in researchers}
+        researcher_options = ctx.researcher_options
 
         col1, col2 = st.columns([1, 2])
         with col1:
@@ -159,7 +303,7 @@ with tab2:
                     st.info("暂无数据")
 
     # 需求类型视角
-    with sub_tab3:
+    elif sub_tab == "📁 需求类型视角":
         st.subheader("📁 需求类型详情")
 
         col1, col2 = st.columns([1, 2])
@@ -212,11 +356,10 @@ with tab2:
                     st.info("暂无数据")
 
     # 客户视角
-    with sub_tab4:
+    elif sub_tab == "🏢 客户视角":
         st.subheader("🏢 客户详情")
 
-        all_requests = get_all_requests()
-        org_names = sorted(list(set(r['org_name'] for r in all_requests if r.get('org_name'))))
+        org_names = list(ctx.org_names)
 
         col1, col2 = st.columns([1, 2])
         with col1:
@@ -268,28 +411,60 @@ with tab2:
             st.divider()
 
             st.write("**需求明细**")
-            requests = detail['requests']
-            if requests:
-                excel_data = export_to_excel(requests)
-                st.download_button(
-                    label="📥 导出Excel",
-                    data=excel_data,
-                    file_name=f"{selected_org}_需求明细.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-
-                for req in requests[:10]:
-                    confidential_badge = "🔒 " if req.get('is_confidential') else ""
-                    status_display = get_status_display(req['status'])
-                    with st.expander(f"{confidential_badge}{req['title']} - {status_display}"):
-                        st.write(f"**需求类型:** {req.get('request_type')}")
-                        st.write(f"**研究员:** {req.get('researcher_name')}")
-                        st.write(f"**工时:** {req.get('work_hours', 0):.1f}H")
+            org_filters = {'org_name': selected_org, 'completed_from': start_date, 'completed_to': end_date}
+            if st.button("📥 导出Excel", key="org_detail_export"):
+                render_excel_download(iter_filtered_requests(org_filters), f"{selected_org}_需求明细.xlsx")
+
+            render_paged_request_list(
+                "org_detail",
+                lambda **kw: get_all_requests_page(org_filters, **kw),
+                reset_token=(selected_org, start_date, end_date),
+                render_item=lambda req: render_request_item_simple(req, key_prefix="org_detail"),
+                empty_text="暂无需求"
+            )
+
+    # 周期分析
+    elif sub_tab == "⏱️ 周期分析":
+        st.subheader("⏱️ 完成周期")
+
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            cycle_dimension = st.selectbox(
+                "分组",
+                ["researcher", "request_type", "org"],
+                format_func=lambda x: {"researcher": "研究员", "request_type": "需求类型", "org": "客户"}[x],
+                key="cycle_dimension"
+            )
+
+        start_date, end_date = render_time_selector("cycle_")
+
+        percentiles = get_turnaround_percentiles(cycle_dimension, start_date, end_date)
+        if percentiles:
+            df = pd.DataFrame(percentiles)
+            df = df.rename(columns={
+                'researcher_name': '研究员', 'request_type': '需求类型', 'org_name': '客户',
+                'count': '完成数', 'avg_hours': '平均(H)',
+                'p50_hours': 'P50(H)', 'p90_hours': 'P90(H)', 'p99_hours': 'P99(H)'
+            })
+            st.dataframe(df, use_container_width=True, hide_index=True)
+        else:
+            st.info("暂无数据")
+
+        st.divider()
+
+        st.subheader("⏳ 未完成需求账龄")
+        aging = get_open_request_aging()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("未完成需求", aging['total'])
+        col2.metric("账龄中位数", f"{aging['median_days']:.1f}天")
+        col3.metric("最长账龄", f"{aging['max_days']:.1f}天")
+
+        render_aging_chart(aging['histogram'])
 
 # ============================================================
 # Tab 3: 数据导出
 # ============================================================
-with tab3:
+elif active_tab == TAB_EXPORT:
     st.subheader("📥 数据导出")
     st.caption("支持多条件筛选后导出Excel")
 
@@ -304,49 +479,37 @@ with tab3:
 
     with col2:
         end_date_export = st.date_input("结束日期", key="export_end")
-        researchers = get_users_by_role('researcher')
-        researcher_names = [r['display_name'] for r in researchers]
-        selected_researchers_export = st.multiselect("研究员（可多选）", researcher_names, key="export_researchers")
+        researcher_ids_export = ctx.researcher_options
+        selected_researchers_export = st.multiselect("研究员（可多选）", list(researcher_ids_export.keys()),
+                                                     key="export_researchers")
 
     with col3:
-        all_requests = get_all_requests()
-        org_list = sorted(list(set(r['org_name'] for r in all_requests if r.get('org_name'))))
+        org_list = list(ctx.org_names)
         selected_orgs_export = st.multiselect("机构（可多选）", org_list, key="export_orgs")
         status_options_export = ["待处理", "处理中", "已完成"]
         selected_statuses_export = st.multiselect("状态（可多选）", status_options_export, key="export_statuses")
 
     st.divider()
 
-    if st.button("🔍 预览筛选结果", type="secondary", use_container_width=True):
-        filter_start = datetime.combine(start_date_export, datetime.min.time()) if start_date_export else None
-        filter_end = datetime.combine(end_date_export, datetime.max.time()) if end_date_export else None
+    status_map = {"待处理": "pending", "处理中": "in_progress", "已完成": "completed"}
+    export_filters = {
+        'request_type': selected_types_export,
+        'researcher_id': [researcher_ids_export[name] for name in selected_researchers_export],
+        'org_name': selected_orgs_export,
+        'status': [status_map[s] for s in selected_statuses_export],
+    }
+    if start_date_export and end_date_export:
+        export_filters['created_from'], export_filters['created_to'] = day_range_ts(start_date_export, end_date_export)
 
-        all_data = get_all_requests()
-        filtered_data = all_data
-
-        if filter_start and filter_end:
-            filtered_data = [r for r in filtered_data
-                             if filter_start <= datetime.fromisoformat(r['created_at']) <= filter_end]
-
-        if selected_types_export:
-            filtered_data = [r for r in filtered_data if r.get('request_type') in selected_types_export]
-
-        if selected_researchers_export:
-            filtered_data = [r for r in filtered_data if r.get('researcher_name') in selected_researchers_export]
-
-        if selected_orgs_export:
-            filtered_data = [r for r in filtered_data if r.get('org_name') in selected_orgs_export]
-
-        if selected_statuses_export:
-            status_map = {"待处理": "pending", "处理中": "in_progress", "已完成": "completed"}
-            selected_status_values = [status_map[s] for s in selected_statuses_export]
-            filtered_data = [r for r in filtered_data if r.get('status') in selected_status_values]
+    if st.button("🔍 预览筛选结果", type="secondary", use_container_width=True):
+        preview_page = get_all_requests_page(export_filters, page_size=20, with_total=True)
+        filtered_data = preview_page['items']
 
-        st.success(f"筛选结果：共 {len(filtered_data)} 条记录")
+        st.success(f"筛选结果：共 {preview_page['total']} 条记录")
 
         if filtered_data:
             preview_data = []
-            for r in filtered_data[:20]:
+            for r in filtered_data:
                 preview_data.append({
                     '事项': r.get('title', ''),
                     '需求类型': r.get('request_type', ''),
@@ -359,59 +522,28 @@ with tab3:
             df_preview = pd.DataFrame(preview_data)
             st.dataframe(df_preview, use_container_width=True, hide_index=True)
 
-            if len(filtered_data) > 20:
+            if preview_page['total'] > 20:
                 st.caption("（仅显示前20条，完整数据请下载Excel）")
 
     st.divider()
 
     if st.button("📥 导出Excel", type="primary", use_container_width=True):
-        filter_start = datetime.combine(start_date_export, datetime.min.time()) if start_date_export else None
-        filter_end = datetime.combine(end_date_export, datetime.max.time()) if end_date_export else None
-
-        all_data = get_all_requests()
-        export_data = all_data
-
-        if filter_start and filter_end:
-            export_data = [r for r in export_data
-                           if filter_start <= datetime.fromisoformat(r['created_at']) <= filter_end]
-
-        if selected_types_export:
-            export_data = [r for r in export_data if r.get('request_type') in selected_types_export]
-
-        if selected_researchers_export:
-            export_data = [r for r in export_data if r.get('researcher_name') in selected_researchers_export]
-
-        if selected_orgs_export:
-            export_data = [r for r in export_data if r.get('org_name') in selected_orgs_export]
-
-        if selected_statuses_export:
-            status_map = {"待处理": "pending", "处理中": "in_progress", "已完成": "completed"}
-            selected_status_values = [status_map[s] for s in selected_statuses_export]
-            export_data = [r for r in export_data if r.get('status') in selected_status_values]
-
-        if export_data:
-            excel_bytes = export_to_excel(export_data)
-            st.download_button(
-                label="💾 下载Excel文件",
-                data=excel_bytes,
-                file_name=f"需求明细_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
-        else:
-            st.warning("没有符合条件的数据")
+        # 游标分批读取 + 只写模式逐行写入临时文件，内存占用与导出行数无关
+        render_excel_download(
+            iter_filtered_requests(export_filters),
+            f"需求明细_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+            use_container_width=True
+        )
 
 # ============================================================
 # Tab 4: 系统管理
 # ============================================================
-with tab4:
-    sub_tab1, sub_tab2, sub_tab3 = st.tabs(["🔄 重派管理", "🌐 公开需求", "👥 用户管理"])
+elif active_tab == TAB_SYSTEM:
+    sub_tab = render_tab_nav(["🔄 重派管理", "🌐 公开需求", "👥 用户管理"], key="admin_system_tab")
 
-    with sub_tab1:
+    if sub_tab == "🔄 重派管理":
         st.subheader("需求管理")
 
-        all_requests = get_all_requests()
-
         col1, col2 = st.columns([1, 3])
         with col1:
             status_options = ["全部", "待处理", "处理中", "已完成"]
@@ -419,83 +551,17 @@ with tab4:
         with col2:
             keyword = render_keyword_filter(key="reassign_keyword")
 
-        filtered_requests = all_requests
-        if selected_status != "全部":
-            status_map = {"待处理": "pending", "处理中": "in_progress", "已完成": "completed"}
-            filtered_requests = [r for r in filtered_requests if r['status'] == status_map.get(selected_status)]
-
-        if keyword:
-            kw = keyword.lower()
-            filtered_requests = [r for r in filtered_requests
-                                 if kw in (r.get('title') or '').lower()
-                                 or kw in (r.get('org_name') or '').lower()]
-
-        researchers = get_users_by_role('researcher')
-        researcher_options = {r['display_name']: r['id'] for r in researchers}
-
-        if not filtered_requests:
-            st.info("没有符合条件的需求")
-        else:
-            st.write(f"共 {len(filtered_requests)} 条需求")
-
-            for req in filtered_requests:
-                confidential_badge = "🔒 " if req.get('is_confidential') else "🔓 "
-                status_display = get_status_display(req['status'])
-
-                with st.expander(f"{confidential_badge}**{req['title']}** - {status_display}"):
-                    col1, col2 = st.columns(2)
-
-                    with col1:
-                        st.write(f"**销售:** {req['sales_name']}")
-                        st.write(f"**需求类型:** {req.get('request_type', '-')}")
-
-                    with col2:
-                        st.write(f"**研究员:** {req['researcher_name']}")
-                        st.write(f"**机构:** {req.get('org_name', '-')}")
-
-                    st.divider()
-
-                    col_a, col_b, col_c, col_d = st.columns([2, 1, 2, 1])
-
-                    with col_a:
-                        current_index = 0
-                        if req['researcher_name'] in researcher_options:
-                            current_index = list(researcher_options.keys()).index(req['researcher_name'])
-
-                        new_researcher = st.selectbox(
-                            "重派给",
-                            list(researcher_options.keys()),
-                            index=current_index,
-                            key=f"reassign_{req['id']}"
-                        )
-
-                    with col_b:
-                        if st.button("确认重派", key=f"confirm_reassign_{req['id']}"):
-                            new_id = researcher_options[new_researcher]
-                            if new_id != req['researcher_id']:
-                                reassign_researcher(req['id'], new_id)
-                                st.success(f"已重派给 {new_researcher}")
-                                st.rerun()
-
-                    with col_c:
-                        current_conf = req.get('is_confidential', 0)
-                        new_conf_status = st.radio(
-                            "保密状态",
-                            ["公开", "保密"],
-                            index=1 if current_conf else 0,
-                            key=f"conf_{req['id']}",
-                            horizontal=True
-                        )
-
-                    with col_d:
-                        if st.button("确认修改", key=f"confirm_conf_{req['id']}"):
-                            new_is_conf = (new_conf_status == "保密")
-                            if new_is_conf != bool(current_conf):
-                                toggle_confidential(req['id'], new_is_conf)
-                                st.success(f"已修改为{new_conf_status}")
-                                st.rerun()
-
-    with sub_tab2:
+        status_map = {"待处理": "pending", "处理中": "in_progress", "已完成": "completed"}
+        filters = {'status': status_map.get(selected_status), 'keyword': keyword}
+        render_paged_request_list(
+            "reassign",
+            lambda **kw: get_all_requests_page(filters, **kw),
+            reset_token=(selected_status, keyword),
+            render_item=render_reassign_item,
+            empty_text="没有符合条件的需求"
+        )
+
+    elif sub_tab == "🌐 公开需求":
         st.subheader("公开需求")
 
         col1, col2, col3 = st.columns(3)
@@ -509,43 +575,21 @@ with tab4:
             scope_options_pub = ["全部"] + RESEARCH_SCOPES
             selected_scope_pub = st.selectbox("研究范畴", scope_options_pub, key="public_scope")
 
-        all_requests = get_all_requests()
-        public_requests = [r for r in all_requests if not r.get('is_confidential')]
-
-        filtered_public = public_requests
-        if selected_status_pub != "全部":
-            status_map = {"待处理": "pending", "处理中": "in_progress", "已完成": "completed"}
-            filtered_public = [r for r in filtered_public if r['status'] == status_map.get(selected_status_pub)]
-        if selected_type_pub != "全部":
-            filtered_public = [r for r in filtered_public if r.get('request_type') == selected_type_pub]
-        if selected_scope_pub != "全部":
-            filtered_public = [r for r in filtered_public if r.get('research_scope') == selected_scope_pub]
-
-        st.write(f"共 {len(filtered_public)} 条记录")
-
-        if not filtered_public:
-            st.info("暂无公开需求")
-        else:
-            for req in filtered_public[:20]:
-                status_display = get_status_display(req['status'])
-
-                with st.expander(f"**{req['title']}** - {status_display}"):
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.write(f"**需求类型:** {req.get('request_type') or '-'}")
-                        st.write(f"**研究员:** {req.get('researcher_name', '-')}")
-                    with col2:
-                        st.write(f"**销售:** {req.get('sales_name', '-')}")
-                        st.write(f"**创建时间:** {req.get('created_at', '-')}")
-
-                    if req.get('description'):
-                        st.write(f"**内容概要:** {req['description']}")
-
-                    if req['status'] == 'completed' and req.get('result_note'):
-                        st.divider()
-                        st.write(f"**处理结果:** {req.get('result_note')}")
-
-    with sub_tab3:
+        status_map = {"待处理": "pending", "处理中": "in_progress", "已完成": "completed"}
+        filters = {
+            'status': status_map.get(selected_status_pub),
+            'request_type': None if selected_type_pub == "全部" else selected_type_pub,
+            'research_scope': None if selected_scope_pub == "全部" else selected_scope_pub,
+        }
+        render_paged_request_list(
+            "admin_public",
+            lambda **kw: get_public_requests_page(filters, **kw),
+            reset_token=tuple(filters.values()),
+            render_item=render_admin_public_item,
+            empty_text="暂无公开需求"
+        )
+
+    elif sub_tab == "👥 用户管理":
         st.subheader("添加用户")
 
         form_data = render_user_form()
@@ -565,7 +609,7 @@ with tab4:
         st.divider()
         st.subheader("现有用户")
 
-        users = get_all_users()
+        users = ctx.all_users
 
         for u in users:
             col1, col2, col3 = st.columns([3, 2, 1])
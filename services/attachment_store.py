@@ -0,0 +1,171 @@
+# services/attachment_store.py - 附件存储（内容寻址）
+#
+# 文件内容按 SHA-256 存放: UPLOAD_DIR/objects/<前两位>/<完整哈希>
+#   - 上传时分块读取、边写临时文件边计算哈希，内存占用与文件大小无关
+#   - 写完后原子重命名到目标位置，不会留下写了一半的文件
+#   - 相同内容只存一份，重复上传只增加一行元数据
+# 元数据（文件名、类型、大小、哈希、所属需求、上传时间）存放在 attachments 表。
+# 图片附件的预览缩略图存放在原文件旁边（<文件>.thumb.jpg），孤儿回收时跟随原文件一并处理（见 services/maintenance.py）。
+
+import hashlib
+import mimetypes
+import os
+import tempfile
+
+from config import ATTACHMENT_CHUNK_SIZE, THUMBNAIL_MAX_SIZE, UPLOAD_DIR
+from core.cache import bump_data_version
+from core.database import get_connection
+from core.timeutils import now_ts
+
+OBJECTS_DIR = os.path.join(UPLOAD_DIR, "objects")
+TMP_DIR = os.path.join(UPLOAD_DIR, "tmp")
+
+
+def blob_path(sha256: str) -> str:
+    """内容哈希对应的存储路径"""
+    return os.path.join(OBJECTS_DIR, sha256[:2], sha256)
+
+
+def _write_blob(fileobj) -> tuple[str, int]:
+    """
+    分块写入临时文件并计算 SHA-256，完成后原子重命名为内容地址
+    内容已存在时丢弃临时文件
+    返回: (sha256, 字节数)
+    """
+    os.makedirs(TMP_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    # 临时文件与目标在同一目录树下，保证 os.replace 是同一文件系统内的原子重命名
+    fd, tmp_path = tempfile.mkstemp(dir=TMP_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = fileobj.read(ATTACHMENT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+
+        sha256 = digest.hexdigest()
+        target = blob_path(sha256)
+        if os.path.exists(target):
+            os.remove(tmp_path)
+            # 复用的可能是尚未回收的孤儿文件：刷新修改时间，
+            # 让孤儿回收的保护期覆盖到元数据写入之前
+            os.utime(target)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(tmp_path, target)
+        return sha256, size
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_attachment(request_id: int, fileobj, file_name: str, mime: str = None,
+                    uploaded_by: int = None) -> dict:
+    """
+    保存上传的附件
+    fileobj: 可分块 read() 的文件对象（如 Streamlit UploadedFile）
+    同一需求重复上传相同文件名、相同内容时返回已有记录
+    返回: 附件元数据
+    """
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+    sha256, size = _write_blob(fileobj)
+    mime = mime or mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+    storage_path = blob_path(sha256)
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT * FROM attachments
+            WHERE request_id = ? AND sha256 = ? AND file_name = ?
+        ''', (request_id, sha256, file_name))
+        row = cursor.fetchone()
+        if row:
+            return dict(row)
+
+        cursor.execute('''
+            INSERT INTO attachments
+            (request_id, file_name, mime, size, sha256, storage_path, uploaded_by, uploaded_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (request_id, file_name, mime, size, sha256, storage_path, uploaded_by, now_ts()))
+        conn.commit()
+        attachment_id = cursor.lastrowid
+
+        cursor.execute("SELECT * FROM attachments WHERE id = ?", (attachment_id,))
+        result = dict(cursor.fetchone())
+
+    bump_data_version()
+    # 图片上传时顺带生成缩略图，失败不影响上传（元数据已提交，预览时会再尝试）
+    if mime.startswith("image/"):
+        try:
+            get_thumbnail(result)
+        except Exception:
+            pass
+    return result
+
+
+# ============================================================
+# 缩略图
+# ============================================================
+
+THUMBNAIL_SUFFIX = ".thumb.jpg"
+
+
+def thumbnail_path(storage_path: str) -> str:
+    """附件文件对应的缩略图路径"""
+    return storage_path + THUMBNAIL_SUFFIX
+
+
+def _make_thumbnail(source: str, target: str) -> bool:
+    """生成 JPEG 缩略图，先写临时文件再原子重命名；不是可识别的图片返回 False"""
+    from PIL import Image, UnidentifiedImageError
+
+    os.makedirs(TMP_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=TMP_DIR, suffix=".thumb")
+    os.close(fd)
+    try:
+        with Image.open(source) as img:
+            # JPEG 可在解码时直接按比例缩小，大图不必完整解码
+            img.draft("RGB", (THUMBNAIL_MAX_SIZE, THUMBNAIL_MAX_SIZE))
+            img.thumbnail((THUMBNAIL_MAX_SIZE, THUMBNAIL_MAX_SIZE))
+            if img.mode in ("RGBA", "LA", "P"):
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, "white")
+                background.paste(img, mask=img.getchannel("A"))
+                img = background
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+            img.save(tmp_path, "JPEG", quality=80, optimize=True)
+        os.replace(tmp_path, target)
+        return True
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
+        # 声明尺寸超过 Pillow 像素上限的图片（解压炸弹）同样不生成缩略图
+        return False
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def get_thumbnail(attachment: dict) -> str | None:
+    """
+    获取图片附件的缩略图路径，首次访问时生成
+    不是图片、文件不存在或无法解码时返回 None
+    """
+    if not (attachment.get('mime') or '').startswith("image/"):
+        return None
+
+    source = attachment['storage_path']
+    target = thumbnail_path(source)
+    if os.path.exists(target):
+        return target
+    if not os.path.exists(source):
+        return None
+    return target if _make_thumbnail(source, target) else None
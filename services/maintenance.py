@@ -0,0 +1,215 @@
+# services/maintenance.py - 附件存储维护：孤儿文件回收 + 存储占用统计
+#
+# 一次遍历 UPLOAD_DIR + 一次数据库查询，对比出没有任何元数据引用的文件（孤儿），
+# 同时按机构 / 研究员统计附件占用。
+#
+#     python -m services.maintenance                 # 只报告，不修改文件
+#     python -m services.maintenance --quarantine    # 孤儿文件移到 uploads/quarantine/<时间>/
+#     python -m services.maintenance --delete        # 直接删除孤儿文件
+#     python -m services.maintenance --db other.db   # 指定数据库文件
+#
+# 数据库只读打开，不会创建或迁移；附件路径相对数据库所在目录（应用目录）解析。
+
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+from config import UPLOAD_DIR
+from core.database import DB_PATH
+from core.migrations import LATEST_VERSION, get_schema_version
+from services.attachment_store import THUMBNAIL_SUFFIX, TMP_DIR
+
+QUARANTINE_DIR = os.path.join(UPLOAD_DIR, "quarantine")
+
+# 最近修改过的文件不当作孤儿：上传时先落盘再写元数据，避免误删正在上传的文件
+ORPHAN_MIN_AGE_SECONDS = 3600
+
+
+def open_readonly(db_path: str) -> sqlite3.Connection:
+    """
+    只读打开数据库
+    文件不存在或结构版本不是最新时报错，避免路径写错时对着一个空库把所有附件当成孤儿
+    """
+    if not os.path.isfile(db_path):
+        raise FileNotFoundError(f"数据库文件不存在: {db_path}")
+    conn = sqlite3.connect(Path(db_path).resolve().as_uri() + "?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    version = get_schema_version(conn)
+    if version != LATEST_VERSION:
+        conn.close()
+        raise ValueError(f"数据库结构版本为 {version}，需要 {LATEST_VERSION}，请先执行 python -m core.migrations")
+    return conn
+
+
+def _scan_uploads(base_dir: str) -> dict:
+    """遍历上传目录（跳过隔离区），返回 {相对 base_dir 的规范化路径: (字节数, 修改时间)}"""
+    files = {}
+    quarantine = os.path.normpath(os.path.join(base_dir, QUARANTINE_DIR))
+    for root, dirs, names in os.walk(os.path.join(base_dir, UPLOAD_DIR)):
+        if os.path.normpath(root) == quarantine:
+            dirs[:] = []
+            continue
+        for name in names:
+            full_path = os.path.join(root, name)
+            stat = os.stat(full_path)
+            files[os.path.normpath(os.path.relpath(full_path, base_dir))] = (stat.st_size, stat.st_mtime)
+    return files
+
+
+def _load_references(conn: sqlite3.Connection) -> list:
+    """
+    一次查询取出所有被引用的文件及其归属
+    包括 attachments 元数据和旧版 requests.attachment_path（尚未回填的也不会被误删）
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT a.storage_path, a.size, r.org_name, u.display_name AS researcher_name
+        FROM attachments a
+        LEFT JOIN requests r ON a.request_id = r.id
+        LEFT JOIN users u ON r.researcher_id = u.id
+        UNION ALL
+        SELECT r.attachment_path, NULL, r.org_name, u.display_name
+        FROM requests r
+        LEFT JOIN users u ON r.researcher_id = u.id
+        WHERE r.attachment_path IS NOT NULL AND r.attachment_path != ''
+    ''')
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def _is_orphan(path: str, referenced: set) -> bool:
+    """缩略图跟随原文件：原文件不再被引用时缩略图也是孤儿"""
+    if path.endswith(THUMBNAIL_SUFFIX):
+        path = path[:-len(THUMBNAIL_SUFFIX)]
+    return path not in referenced
+
+
+def _usage_rows(references: list, files: dict) -> list:
+    """
+    统计用的附件行：attachments 元数据 + 尚未回填到 attachments 的旧版 attachment_path
+    旧版路径没有大小记录，取实际文件大小
+    """
+    attached = {ref['storage_path'] for ref in references if ref['size'] is not None}
+    rows = []
+    for ref in references:
+        if ref['size'] is None:
+            if ref['storage_path'] in attached:
+                continue
+            ref = dict(ref, size=files.get(os.path.normpath(ref['storage_path']), (0, 0))[0])
+        rows.append(ref)
+    return rows
+
+
+def _group_usage(rows: list, field: str) -> list:
+    """按字段汇总附件数和占用字节（按附件计，多个需求共用的文件分别计入）"""
+    groups = {}
+    for ref in rows:
+        key = ref[field] or '-'
+        item = groups.setdefault(key, {field: key, 'count': 0, 'bytes': 0})
+        item['count'] += 1
+        item['bytes'] += ref['size']
+    return sorted(groups.values(), key=lambda x: x['bytes'], reverse=True)
+
+
+def reconcile(action: str = "report", db_path: str = DB_PATH) -> dict:
+    """
+    对比上传目录与数据库，处理孤儿文件并统计存储占用
+    action: 'report' 只统计 | 'quarantine' 移到隔离区 | 'delete' 删除
+    db_path: 数据库文件，上传目录按其所在目录解析
+    返回: {
+        'total_files', 'total_bytes': 目录中的文件数 / 字节数（不含隔离区）,
+        'orphans': [{'path', 'bytes'}], 'orphan_bytes',
+        'missing': 元数据引用但文件不存在的路径,
+        'by_org', 'by_researcher': [{'org_name' / 'researcher_name', 'count', 'bytes'}],
+    }
+    """
+    if action not in ("report", "quarantine", "delete"):
+        raise ValueError(f"不支持的操作: {action}")
+
+    conn = open_readonly(db_path)
+    try:
+        references = _load_references(conn)
+    finally:
+        conn.close()
+    base_dir = os.path.dirname(os.path.abspath(db_path))
+    files = _scan_uploads(base_dir)
+    referenced = {os.path.normpath(ref['storage_path']) for ref in references}
+
+    cutoff = time.time() - ORPHAN_MIN_AGE_SECONDS
+    tmp_dir = os.path.normpath(TMP_DIR)
+    orphans = [
+        {'path': path, 'bytes': size}
+        for path, (size, mtime) in sorted(files.items())
+        if mtime < cutoff and (os.path.dirname(path) == tmp_dir or _is_orphan(path, referenced))
+    ]
+
+    if action != "report" and orphans and not references:
+        # 数据库没有任何附件引用却有附件文件，多半是指定错了数据库，不动文件
+        raise ValueError(f"数据库中没有任何附件引用，但发现 {len(orphans)} 个孤儿文件，拒绝执行 {action}")
+
+    if action != "report":
+        target_root = os.path.join(base_dir, QUARANTINE_DIR, datetime.now().strftime("%Y%m%d_%H%M%S"))
+        for orphan in orphans:
+            path = os.path.join(base_dir, orphan['path'])
+            if action == "delete":
+                os.remove(path)
+            else:
+                target = os.path.join(target_root, os.path.relpath(orphan['path'], UPLOAD_DIR))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(path, target)
+
+    usage = _usage_rows(references, files)
+    return {
+        'total_files': len(files),
+        'total_bytes': sum(size for size, _ in files.values()),
+        'orphans': orphans,
+        'orphan_bytes': sum(o['bytes'] for o in orphans),
+        'missing': sorted(path for path in referenced if path not in files),
+        'by_org': _group_usage(usage, 'org_name'),
+        'by_researcher': _group_usage(usage, 'researcher_name'),
+    }
+
+
+def format_size(num_bytes: int) -> str:
+    """字节数格式化为 KB / MB / GB"""
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="附件孤儿文件回收与存储统计")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--quarantine", action="store_true", help="把孤儿文件移到隔离目录")
+    group.add_argument("--delete", action="store_true", help="删除孤儿文件")
+    parser.add_argument("--db", default=DB_PATH, help="数据库文件（默认 data.db）")
+    args = parser.parse_args()
+
+    action = "delete" if args.delete else "quarantine" if args.quarantine else "report"
+    try:
+        report = reconcile(action, args.db)
+    except (FileNotFoundError, ValueError) as e:
+        sys.exit(f"错误: {e}")
+
+    print(f"上传目录: {report['total_files']} 个文件，{format_size(report['total_bytes'])}")
+    verb = {"report": "发现", "quarantine": "已隔离", "delete": "已删除"}[action]
+    print(f"孤儿文件: {verb} {len(report['orphans'])} 个，{format_size(report['orphan_bytes'])}")
+    for orphan in report['orphans']:
+        print(f"  {orphan['path']} ({format_size(orphan['bytes'])})")
+    if report['missing']:
+        print(f"文件缺失: {len(report['missing'])} 个（元数据存在但文件不存在）")
+        for path in report['missing']:
+            print(f"  {path}")
+
+    for title, field, rows in (("按机构", 'org_name', report['by_org']),
+                               ("按研究员", 'researcher_name', report['by_researcher'])):
+        print(f"\n{title}:")
+        for row in rows:
+            print(f"  {row[field]}: {row['count']} 个附件，{format_size(row['bytes'])}")
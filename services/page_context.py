@@ -0,0 +1,54 @@
+# services/page_context.py - 页面级数据上下文
+#
+# 一次页面运行（rerun）内各个 tab 共享同一份基础数据：
+# 每个数据集在第一次访问时加载，之后直接复用；
+# 返回只读视图（tuple + MappingProxyType），避免某个 tab 修改后影响其他 tab。
+# 页面脚本每次 rerun 都会重新执行，在脚本顶部创建的上下文天然只在本次运行内有效。
+
+from types import MappingProxyType
+
+from services.request_service import get_org_names
+from services.user_service import get_all_users, get_users_by_role
+
+
+def _freeze_rows(rows: list) -> tuple:
+    """list[dict] -> tuple[只读 dict]"""
+    return tuple(MappingProxyType(dict(row)) for row in rows)
+
+
+class PageDataContext:
+    """按需加载、单次运行内复用的页面数据"""
+
+    def __init__(self):
+        self._datasets = {}
+
+    def _load(self, name, loader):
+        if name not in self._datasets:
+            self._datasets[name] = loader()
+        return self._datasets[name]
+
+    def users_by_role(self, role: str) -> tuple:
+        """指定角色的用户"""
+        return self._load(('users', role), lambda: _freeze_rows(get_users_by_role(role)))
+
+    @property
+    def researchers(self) -> tuple:
+        """研究员列表"""
+        return self.users_by_role('researcher')
+
+    @property
+    def researcher_options(self) -> MappingProxyType:
+        """研究员 {显示名: id}，用于下拉选择"""
+        return self._load('researcher_options', lambda: MappingProxyType(
+            {r['display_name']: r['id'] for r in self.researchers}
+        ))
+
+    @property
+    def all_users(self) -> tuple:
+        """所有用户（不含密码）"""
+        return self._load('all_users', lambda: _freeze_rows(get_all_users()))
+
+    @property
+    def org_names(self) -> tuple:
+        """所有机构名称（排序）"""
+        return self._load('org_names', lambda: tuple(get_org_names()))
@@ -1,7 +1,11 @@
 # services/request_service.py - 需求相关业务逻辑
 
-from datetime import datetime
+from functools import lru_cache
+from core import database
+from core.cache import bump_data_version
 from core.database import get_connection
+from core.timeutils import day_range_ts, now_local, now_ts, to_ts
+from config import PAGE_SIZE
 
 
 def create_request(
@@ -26,13 +30,22 @@ def create_request(
         ''', (title, description, request_type, research_scope, org_name, org_type,
               sales_id, researcher_id, 1 if is_confidential else 0))
         conn.commit()
+        bump_data_version()
         return cursor.lastrowid
 
 
-def _build_request_query(where_clause: str = "") -> str:
+# 列表视图只需要的列：不含 description / result_note / attachment_path 等大字段
+SUMMARY_COLUMNS = '''
+    r.id, r.title, r.request_type, r.research_scope, r.org_name, r.org_type,
+    r.sales_id, r.researcher_id, r.is_confidential, r.status, r.work_hours,
+    r.created_at, r.updated_at, r.completed_at
+'''
+
+
+def _build_request_query(where_clause: str = "", limit: bool = False, columns: str = "r.*") -> str:
     """构建带用户名的需求查询SQL"""
-    base = '''
-        SELECT r.*, 
+    base = f'''
+        SELECT {columns}, 
                s.display_name as sales_name,
                s.username as sales_username,
                res.display_name as researcher_name
@@ -42,10 +55,272 @@ def _build_request_query(where_clause: str = "") -> str:
     '''
     if where_clause:
         base += f" WHERE {where_clause}"
-    base += " ORDER BY r.created_at DESC"
+    base += " ORDER BY r.created_at DESC, r.id DESC"
+    if limit:
+        base += " LIMIT ?"
     return base
 
 
+# ============================================================
+# 分页查询（游标 = 上一页最后一行的 (created_at, id)）
+# ============================================================
+
+# 非管理员可见性：公开需求，或自己创建/承接的保密需求（参数: 用户ID, 用户ID）
+_VISIBILITY_CONDITION = "(r.is_confidential = 0 OR r.sales_id = ? OR r.researcher_id = ?)"
+
+# 可按单值或列表筛选的字段
+_FILTER_FIELDS = ('status', 'request_type', 'research_scope', 'org_name', 'org_type', 'sales_id', 'researcher_id')
+
+# 时间区间筛选：filters key -> (列, 比较符)
+_RANGE_FILTERS = {
+    'created_from': ('created_at', '>='),
+    'created_to': ('created_at', '<='),
+    'completed_from': ('completed_at', '>='),
+    'completed_to': ('completed_at', '<='),
+}
+
+
+def build_request_filters(filters: dict | None, alias: str = "r") -> tuple[list, list]:
+    """
+    将筛选条件转换为参数化的 SQL 条件
+    filters: {
+        'status' / 'request_type' / 'research_scope' / 'org_name' / 'org_type'
+        / 'sales_id' / 'researcher_id': 单值，或列表（IN 查询）,
+        'is_confidential': bool,
+        'keyword': str（事项名称/机构模糊匹配）,
+        'created_from' / 'created_to' / 'completed_from' / 'completed_to': 时间区间（epoch 秒或 datetime）,
+    }
+    值为 None、空字符串或空列表的条件视为"全部"，不生成 SQL
+    返回: (条件列表, 参数列表)，条件之间用 AND 连接
+    """
+    clauses, params = [], []
+    if not filters:
+        return clauses, params
+
+    for field in _FILTER_FIELDS:
+        value = filters.get(field)
+        if value is None or value == "":
+            continue
+        if isinstance(value, (list, tuple, set)):
+            values = list(value)
+            if not values:
+                continue
+            if len(values) == 1:
+                clauses.append(f"{alias}.{field} = ?")
+            else:
+                clauses.append(f"{alias}.{field} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        else:
+            clauses.append(f"{alias}.{field} = ?")
+            params.append(value)
+
+    if filters.get('is_confidential') is not None:
+        clauses.append(f"{alias}.is_confidential = ?")
+        params.append(1 if filters['is_confidential'] else 0)
+
+    for key, (column, op) in _RANGE_FILTERS.items():
+        if filters.get(key) is not None:
+            clauses.append(f"{alias}.{column} {op} ?")
+            params.append(to_ts(filters[key]))
+
+    if filters.get('keyword'):
+        kw_clauses, kw_params = _keyword_conditions(filters['keyword'], alias, ('title', 'org_name'))
+        clauses.extend(kw_clauses)
+        params.extend(kw_params)
+
+    return clauses, params
+
+
+# ============================================================
+# 全文搜索（requests_fts，trigram 分词）
+# ============================================================
+
+# trigram 索引能命中的最短词长，更短的词退化为 LIKE
+FTS_MIN_TERM_LENGTH = 3
+
+# 全文索引列及 bm25 权重（事项名称、机构优先）
+_FTS_COLUMNS = ('title', 'description', 'org_name', 'result_note')
+_FTS_WEIGHTS = (10.0, 1.0, 5.0, 1.0)
+
+
+@lru_cache(maxsize=None)
+def _fts_enabled(db_path: str) -> bool:
+    """数据库是否已建立全文索引（SQLite 不支持 FTS5/trigram 时迁移会跳过）"""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'requests_fts'"
+        ).fetchone()
+    return row is not None
+
+
+def _split_terms(text: str) -> tuple[list, list]:
+    """按空白拆分搜索词，返回: (可走全文索引的词, 需要 LIKE 的词)"""
+    terms = text.split()
+    if not _fts_enabled(database.DB_PATH):
+        return [], terms
+    long_terms = [t for t in terms if len(t) >= FTS_MIN_TERM_LENGTH]
+    short_terms = [t for t in terms if len(t) < FTS_MIN_TERM_LENGTH]
+    return long_terms, short_terms
+
+
+def _fts_match_expr(terms: list, columns: tuple = None) -> str:
+    """构造 FTS5 MATCH 表达式：每个词作为短语，词之间 AND"""
+    phrases = " AND ".join('"' + t.replace('"', '""') + '"' for t in terms)
+    if columns:
+        return f"{{{' '.join(columns)}}} : ({phrases})"
+    return phrases
+
+
+def _keyword_conditions(keyword: str, alias: str, columns: tuple) -> tuple[list, list]:
+    """关键词条件：长词走全文索引，短词在指定列上 LIKE"""
+    clauses, params = [], []
+    long_terms, short_terms = _split_terms(keyword)
+
+    if long_terms:
+        clauses.append(f"{alias}.id IN (SELECT rowid FROM requests_fts WHERE requests_fts MATCH ?)")
+        params.append(_fts_match_expr(long_terms, columns))
+
+    for term in short_terms:
+        clauses.append("(" + " OR ".join(f"{alias}.{col} LIKE ?" for col in columns) + ")")
+        params.extend([f"%{term}%"] * len(columns))
+
+    return clauses, params
+
+
+def search_requests(query: str, user: dict = None, filters: dict = None, limit: int = 50) -> list:
+    """
+    全文搜索需求（事项名称、描述、机构、处理结果），按相关度排序
+    user: 传入非管理员用户时按可见性规则过滤
+    filters: 额外筛选条件，格式同 build_request_filters
+    """
+    long_terms, short_terms = _split_terms(query)
+    if not long_terms and not short_terms:
+        return []
+
+    conditions, params = build_request_filters(filters)
+    if user and user['role'] != 'admin':
+        conditions.append(_VISIBILITY_CONDITION)
+        params.extend([user['id'], user['id']])
+
+    for term in short_terms:
+        conditions.append("(" + " OR ".join(f"r.{col} LIKE ?" for col in _FTS_COLUMNS) + ")")
+        params.extend([f"%{term}%"] * len(_FTS_COLUMNS))
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        if not long_terms:
+            cursor.execute(
+                _build_request_query(" AND ".join(conditions), limit=True, columns=SUMMARY_COLUMNS),
+                params + [limit]
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+        extra = "".join(f" AND {c}" for c in conditions)
+        weights = ", ".join(str(w) for w in _FTS_WEIGHTS)
+        cursor.execute(f'''
+            SELECT {SUMMARY_COLUMNS},
+                   s.display_name as sales_name,
+                   s.username as sales_username,
+                   res.display_name as researcher_name,
+                   bm25(requests_fts, {weights}) as rank
+            FROM requests_fts
+            JOIN requests r ON r.id = requests_fts.rowid
+            JOIN users s ON r.sales_id = s.id
+            JOIN users res ON r.researcher_id = res.id
+            WHERE requests_fts MATCH ?{extra}
+            ORDER BY rank
+            LIMIT ?
+        ''', [_fts_match_expr(long_terms)] + params + [limit])
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def _fetch_page(
+        conditions: list,
+        params: list,
+        filters: dict = None,
+        cursor: tuple = None,
+        page_size: int = PAGE_SIZE,
+        with_total: bool = False
+) -> dict:
+    """
+    按 (created_at, id) 倒序取一页，只查询 SUMMARY_COLUMNS，详情用 get_request_by_id 单独获取
+    返回: {'items': 本页需求, 'next_cursor': 下一页游标（没有下一页为 None）, 'total': 总数或 None}
+    """
+    filter_clauses, filter_params = build_request_filters(filters)
+    conditions = conditions + filter_clauses
+    params = params + filter_params
+
+    with get_connection() as conn:
+        db_cursor = conn.cursor()
+
+        total = None
+        if with_total:
+            where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            db_cursor.execute(f"SELECT COUNT(*) FROM requests r {where_sql}", params)
+            total = db_cursor.fetchone()[0]
+
+        page_conditions = list(conditions)
+        page_params = list(params)
+        if cursor:
+            page_conditions.append("(r.created_at, r.id) < (?, ?)")
+            page_params.extend(cursor)
+
+        # 多取一行用于判断是否还有下一页
+        db_cursor.execute(
+            _build_request_query(" AND ".join(page_conditions), limit=True, columns=SUMMARY_COLUMNS),
+            page_params + [page_size + 1]
+        )
+        rows = [dict(row) for row in db_cursor.fetchall()]
+
+    items = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size:
+        last = items[-1]
+        next_cursor = (last['created_at'], last['id'])
+
+    return {'items': items, 'next_cursor': next_cursor, 'total': total}
+
+
+def get_requests_by_sales_page(sales_id: int, filters: dict = None, cursor: tuple = None,
+                               page_size: int = PAGE_SIZE, with_total: bool = False) -> dict:
+    """分页获取销售人员创建的需求"""
+    return _fetch_page(["r.sales_id = ?"], [sales_id], filters, cursor, page_size, with_total)
+
+
+def get_requests_by_researcher_page(researcher_id: int, filters: dict = None, cursor: tuple = None,
+                                    page_size: int = PAGE_SIZE, with_total: bool = False) -> dict:
+    """分页获取分配给研究人员的需求"""
+    return _fetch_page(["r.researcher_id = ?"], [researcher_id], filters, cursor, page_size, with_total)
+
+
+def get_visible_requests_page(user: dict, filters: dict = None, cursor: tuple = None,
+                              page_size: int = PAGE_SIZE, with_total: bool = False) -> dict:
+    """分页获取用户可见的需求（可见性规则同 get_visible_requests_for_user）"""
+    if user['role'] == 'admin':
+        return _fetch_page([], [], filters, cursor, page_size, with_total)
+    return _fetch_page(
+        [_VISIBILITY_CONDITION],
+        [user['id'], user['id']],
+        filters, cursor, page_size, with_total
+    )
+
+
+def get_public_requests_page(filters: dict = None, completed_only: bool = False, cursor: tuple = None,
+                             page_size: int = PAGE_SIZE, with_total: bool = False) -> dict:
+    """分页获取公开需求，completed_only 时只取已完成的"""
+    conditions = ["r.is_confidential = 0"]
+    if completed_only:
+        conditions.append("r.status = 'completed'")
+    return _fetch_page(conditions, [], filters, cursor, page_size, with_total)
+
+
+def get_all_requests_page(filters: dict = None, cursor: tuple = None,
+                          page_size: int = PAGE_SIZE, with_total: bool = False) -> dict:
+    """分页获取所有需求（管理员用）"""
+    return _fetch_page([], [], filters, cursor, page_size, with_total)
+
+
 def get_requests_by_sales(sales_id: int) -> list:
     """获取销售人员创建的需求"""
     with get_connection() as conn:
@@ -86,6 +361,32 @@ def get_visible_requests_for_user(user: dict) -> list:
         return [dict(row) for row in cursor.fetchall()]
 
 
+def get_filtered_requests(filters: dict = None) -> list:
+    """获取满足筛选条件的全部需求（筛选在数据库中完成）"""
+    conditions, params = build_request_filters(filters)
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_build_request_query(" AND ".join(conditions)), params)
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def iter_filtered_requests(filters: dict = None, chunk_size: int = 1000):
+    """
+    逐条产出满足筛选条件的需求（导出用）
+    游标按 chunk_size 分批读取，内存中最多只有一批行
+    """
+    conditions, params = build_request_filters(filters)
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_build_request_query(" AND ".join(conditions)), params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+
+
 def get_public_requests() -> list:
     """获取所有公开需求"""
     with get_connection() as conn:
@@ -102,8 +403,20 @@ def get_all_requests() -> list:
         return [dict(row) for row in cursor.fetchall()]
 
 
+def get_org_names() -> list:
+    """获取所有出现过的机构名称（去重排序，走 org_name 索引，不读取需求明细）"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT DISTINCT org_name FROM requests
+            WHERE org_name IS NOT NULL AND org_name != ''
+            ORDER BY org_name
+        ''')
+        return [row[0] for row in cursor.fetchall()]
+
+
 def get_request_by_id(request_id: int) -> dict | None:
-    """根据ID获取需求详情"""
+    """根据ID获取需求详情（含描述、处理结果、附件等全部字段）"""
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(_build_request_query("r.id = ?"), (request_id,))
@@ -118,20 +431,25 @@ def update_request_status(
         attachment_path: str = None,
         work_hours: float = None
 ):
-    """更新需求状态"""
+    """
+    更新需求状态
+    附件通过 attachment_store.save_attachment 单独保存；
+    attachment_path 只为兼容旧调用保留，未传时不修改原值
+    """
     with get_connection() as conn:
         cursor = conn.cursor()
 
-        now = datetime.now()
+        now = now_ts()
         completed_at = now if status == 'completed' else None
 
         cursor.execute('''
             UPDATE requests 
-            SET status = ?, result_note = ?, attachment_path = ?, 
+            SET status = ?, result_note = ?, attachment_path = COALESCE(?, attachment_path), 
                 work_hours = ?, updated_at = ?, completed_at = ?
             WHERE id = ?
         ''', (status, result_note, attachment_path, work_hours or 0, now, completed_at, request_id))
         conn.commit()
+        bump_data_version()
 
 
 def reassign_researcher(request_id: int, new_researcher_id: int):
@@ -142,8 +460,9 @@ def reassign_researcher(request_id: int, new_researcher_id: int):
             UPDATE requests 
             SET researcher_id = ?, updated_at = ?
             WHERE id = ?
-        ''', (new_researcher_id, datetime.now(), request_id))
+        ''', (new_researcher_id, now_ts(), request_id))
         conn.commit()
+        bump_data_version()
 
 
 def toggle_confidential(request_id: int, is_confidential: bool):
@@ -154,20 +473,22 @@ def toggle_confidential(request_id: int, is_confidential: bool):
             UPDATE requests 
             SET is_confidential = ?, updated_at = ?
             WHERE id = ?
-        ''', (1 if is_confidential else 0, datetime.now(), request_id))
+        ''', (1 if is_confidential else 0, now_ts(), request_id))
         conn.commit()
+        bump_data_version()
 
 
 def get_researcher_today_pending_count(researcher_id: int) -> int:
     """获取研究员今日待完成数量（待处理+处理中）"""
+    today_start, today_end = day_range_ts(now_local().date())
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute('''
             SELECT COUNT(*) FROM requests 
             WHERE researcher_id = ? 
             AND status IN ('pending', 'in_progress')
-            AND DATE(created_at) = DATE('now')
-        ''', (researcher_id,))
+            AND created_at >= ? AND created_at <= ?
+        ''', (researcher_id, today_start, today_end))
         return cursor.fetchone()[0]
 
 
@@ -188,4 +509,50 @@ def check_researcher_workload(researcher_id: int) -> tuple[bool, int]:
     """
     count = get_researcher_today_pending_count(researcher_id)
     is_overloaded = count >= 5
-    return is_overloaded, count
\ No newline at end of file
+    return is_overloaded, count
+
+
+# ============================================================
+# 附件（attachments 表，一个需求可有多个附件）
+# 只返回元数据，不访问文件系统
+# ============================================================
+
+ATTACHMENT_COLUMNS = "id, request_id, file_name, mime, size, sha256, storage_path, uploaded_by, uploaded_at"
+
+
+def list_attachments(request_id: int) -> list:
+    """获取需求的附件列表（按上传顺序）"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT {ATTACHMENT_COLUMNS} FROM attachments
+            WHERE request_id = ?
+            ORDER BY id
+        ''', (request_id,))
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def list_attachments_for_requests(request_ids: list) -> dict:
+    """批量获取多个需求的附件，一次索引查询，返回 {request_id: [附件, ...]}"""
+    result = {request_id: [] for request_id in request_ids}
+    if not request_ids:
+        return result
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT {ATTACHMENT_COLUMNS} FROM attachments
+            WHERE request_id IN ({', '.join('?' * len(request_ids))})
+            ORDER BY request_id, id
+        ''', list(request_ids))
+        for row in cursor.fetchall():
+            result[row['request_id']].append(dict(row))
+    return result
+
+
+def get_attachment(attachment_id: int) -> dict | None:
+    """获取单个附件的元数据（下载时使用 storage_path 读取文件）"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {ATTACHMENT_COLUMNS} FROM attachments WHERE id = ?", (attachment_id,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
@@ -1,15 +1,20 @@
 # services/stats_service.py - 统计相关业务逻辑（增强版）
 
 from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from core.cache import cached
+from core.timeutils import from_ts, now_local, now_ts, sql_local_date, sql_local_strftime, to_ts
 from core.database import get_connection
+from services.request_service import build_request_filters, get_filtered_requests
 
 
 def get_date_range(period: str, custom_start=None, custom_end=None) -> tuple:
     """
-    获取时间范围
+    获取时间范围（业务时区），返回 epoch 秒: (start, end)
     period: 'week' | 'month' | 'quarter' | 'year' | 'custom'
     """
-    now = datetime.now()
+    now = now_local()
     today = now.replace(hour=23, minute=59, second=59, microsecond=0)
 
     if period == 'week':
@@ -26,422 +31,600 @@ def get_date_range(period: str, custom_start=None, custom_end=None) -> tuple:
     else:
         start = today.replace(month=1, day=1, hour=0, minute=0, second=0)
 
-    return start, today
+    return to_ts(start), to_ts(today)
 
 
-def get_overview_stats(start_date=None, end_date=None) -> dict:
-    """获取整体统计数据"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
+def _ts_range(start_date, end_date) -> tuple:
+    """统一区间参数为 epoch 秒（兼容直接传入 datetime）"""
+    return to_ts(start_date), to_ts(end_date)
 
-        if start_date and end_date:
-            cursor.execute('''
-                SELECT 
-                    COUNT(*) as total,
-                    SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending,
-                    SUM(CASE WHEN status = 'in_progress' THEN 1 ELSE 0 END) as in_progress,
-                    SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed,
-                    COALESCE(SUM(work_hours), 0) as total_hours
-                FROM requests
-                WHERE created_at >= ? AND created_at <= ?
-            ''', (start_date, end_date))
-        else:
-            cursor.execute('''
-                SELECT 
-                    COUNT(*) as total,
-                    SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending,
-                    SUM(CASE WHEN status = 'in_progress' THEN 1 ELSE 0 END) as in_progress,
-                    SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed,
-                    COALESCE(SUM(work_hours), 0) as total_hours
-                FROM requests
-            ''')
-
-        row = cursor.fetchone()
-        return dict(row) if row else {}
 
+# ============================================================
+# 通用多维统计：维度 × 指标 × 时间粒度
+# ============================================================
 
-def get_stats_by_researcher(start_date=None, end_date=None) -> list:
-    """按研究员统计"""
+# 维度: 名称 -> (GROUP BY 表达式, SELECT 列, 需要的关联表)
+CUBE_DIMENSIONS = {
+    'researcher': ("r.researcher_id", ["r.researcher_id", "res.display_name AS researcher_name"], 'res'),
+    'sales': ("r.sales_id", ["r.sales_id", "s.display_name AS sales_name"], 's'),
+    'org': ("r.org_name", ["r.org_name"], None),
+    'org_type': ("r.org_type", ["r.org_type"], None),
+    'request_type': ("r.request_type", ["r.request_type"], None),
+    'research_scope': ("r.research_scope", ["r.research_scope"], None),
+    'status': ("r.status", ["r.status"], None),
+}
+
+# 指标: 名称 -> SELECT 表达式
+CUBE_MEASURES = {
+    'count': "COUNT(*) AS total",
+    'pending': "SUM(CASE WHEN r.status = 'pending' THEN 1 ELSE 0 END) AS pending",
+    'in_progress': "SUM(CASE WHEN r.status = 'in_progress' THEN 1 ELSE 0 END) AS in_progress",
+    'completed': "SUM(CASE WHEN r.status = 'completed' THEN 1 ELSE 0 END) AS completed",
+    'work_hours': "COALESCE(SUM(r.work_hours), 0) AS total_hours",
+    # 平均完成周期（小时），只统计已完成的需求
+    'turnaround': "ROUND(AVG(CASE WHEN r.completed_at IS NOT NULL "
+                  "THEN (r.completed_at - r.created_at) / 3600.0 END), 1) AS avg_turnaround_hours",
+}
+
+_CUBE_JOINS = {
+    'res': "LEFT JOIN users res ON r.researcher_id = res.id",
+    's': "LEFT JOIN users s ON r.sales_id = s.id",
+}
+
+# 时间粒度: 名称 -> 周期起始日 'YYYY-MM-DD' 的 SQL 表达式（业务时区）
+CUBE_TIME_BUCKETS = {
+    'day': sql_local_date("{col}"),
+    # 周一为一周的开始
+    'week': sql_local_date("{col}", "weekday 0", "-6 days"),
+    'month': sql_local_strftime("%Y-%m-01", "{col}"),
+    'quarter': "printf('%s-%02d-01', " + sql_local_strftime("%Y", "{col}") + ", "
+               "(CAST(" + sql_local_strftime("%m", "{col}") + " AS INTEGER) - 1) / 3 * 3 + 1)",
+    'year': sql_local_strftime("%Y-01-01", "{col}"),
+}
+
+_CUBE_DATE_FIELDS = ('created_at', 'completed_at', 'updated_at')
+
+
+def _build_cube_query(dimensions, measures, time_bucket, start_date, end_date,
+                      date_field, filters, order_by) -> tuple:
+    """根据维度/指标生成一条分组查询，返回 (sql, params)"""
+    unknown = [d for d in dimensions if d not in CUBE_DIMENSIONS]
+    unknown += [m for m in measures if m not in CUBE_MEASURES]
+    if unknown:
+        raise ValueError(f"不支持的统计维度或指标: {', '.join(unknown)}")
+    if time_bucket and time_bucket not in CUBE_TIME_BUCKETS:
+        raise ValueError(f"不支持的时间粒度: {time_bucket}")
+    if date_field not in _CUBE_DATE_FIELDS:
+        raise ValueError(f"不支持的时间字段: {date_field}")
+    if order_by and order_by not in {_column_alias(CUBE_MEASURES[m]) for m in measures}:
+        raise ValueError(f"排序列必须是已选指标的列名: {order_by}")
+
+    selects, group_by, joins = [], [], []
+    if time_bucket:
+        bucket = CUBE_TIME_BUCKETS[time_bucket].format(col=f"r.{date_field}")
+        selects.append(f"{bucket} AS bucket")
+        group_by.append("bucket")
+    for dim in dimensions:
+        group_expr, columns, join = CUBE_DIMENSIONS[dim]
+        selects.extend(columns)
+        group_by.append(group_expr)
+        if join and _CUBE_JOINS[join] not in joins:
+            joins.append(_CUBE_JOINS[join])
+    # 按机构统计但未单独分组机构类型时，附带机构类型便于展示
+    if 'org' in dimensions and 'org_type' not in dimensions:
+        selects.append("MAX(r.org_type) AS org_type")
+    selects.extend(CUBE_MEASURES[m] for m in measures)
+
+    conditions, params = build_request_filters(filters or {})
+    if start_date and end_date:
+        conditions.append(f"r.{date_field} >= ? AND r.{date_field} <= ?")
+        params.extend([start_date, end_date])
+    elif time_bucket:
+        conditions.append(f"r.{date_field} IS NOT NULL")
+
+    sql = f"SELECT {', '.join(selects)} FROM requests r {' '.join(joins)}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    if group_by:
+        sql += " GROUP BY " + ", ".join(group_by)
+
+    order = ["bucket"] if time_bucket else []
+    if order_by:
+        order.append(f"{order_by} DESC")
+    if order:
+        sql += " ORDER BY " + ", ".join(order)
+    return sql, params
+
+
+@cached(maxsize=256)
+def get_cube(dimensions=(), measures=('count', 'completed', 'work_hours'), time_bucket=None,
+             start_date=None, end_date=None, date_field='created_at', filters=None,
+             order_by=None) -> list:
+    """
+    通用多维统计
+    dimensions: CUBE_DIMENSIONS 中的维度组合，如 ('researcher', 'request_type')
+    measures: CUBE_MEASURES 中的指标，列名分别为 total/pending/in_progress/completed/
+              total_hours/avg_turnaround_hours
+    time_bucket: 'day' | 'week' | 'month' | 'quarter' | 'year'，结果增加 bucket 列（周期起始日）
+    start_date/end_date: 按 date_field 过滤的时间范围
+    filters: 同 build_request_filters 的筛选条件
+    order_by: 降序排序的指标列名，如 'total'
+    """
+    start_date, end_date = _ts_range(start_date, end_date)
+    sql, params = _build_cube_query(tuple(dimensions), tuple(measures), time_bucket,
+                                    start_date, end_date, date_field, filters, order_by)
     with get_connection() as conn:
         cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return [dict(row) for row in cursor.fetchall()]
 
-        date_filter = ""
-        params = []
-        if start_date and end_date:
-            date_filter = "WHERE r.completed_at >= ? AND r.completed_at <= ?"
-            params = [start_date, end_date]
 
-        cursor.execute(f'''
-            SELECT 
-                u.id,
-                u.display_name as researcher_name,
-                COUNT(*) as total,
-                SUM(CASE WHEN r.status = 'completed' THEN 1 ELSE 0 END) as completed,
-                COALESCE(SUM(r.work_hours), 0) as total_hours
-            FROM requests r
-            JOIN users u ON r.researcher_id = u.id
-            {date_filter}
-            GROUP BY r.researcher_id
-            ORDER BY total_hours DESC
-        ''', params)
+def get_overview_stats(start_date=None, end_date=None) -> dict:
+    """获取整体统计数据"""
+    rows = get_cube((), ('count', 'pending', 'in_progress', 'completed', 'work_hours'),
+                    start_date=start_date, end_date=end_date)
+    row = rows[0] if rows else {}
+    return {k: row.get(k) or 0 for k in ('total', 'pending', 'in_progress', 'completed', 'total_hours')}
 
-        return [dict(row) for row in cursor.fetchall()]
+
+def get_stats_by_researcher(start_date=None, end_date=None) -> list:
+    """按研究员统计"""
+    rows = get_cube(('researcher',), start_date=start_date, end_date=end_date,
+                    date_field='completed_at', order_by='total_hours')
+    # 与原先的 JOIN 一致：忽略已删除用户
+    return [{'id': row.pop('researcher_id'), **row} for row in rows if row['researcher_name'] is not None]
 
 
 def get_stats_by_request_type(start_date=None, end_date=None) -> list:
     """按需求类型统计"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
+    return get_cube(('request_type',), start_date=start_date, end_date=end_date,
+                    date_field='completed_at', order_by='total')
 
-        date_filter = ""
-        params = []
-        if start_date and end_date:
-            date_filter = "WHERE completed_at >= ? AND completed_at <= ?"
-            params = [start_date, end_date]
 
-        cursor.execute(f'''
-            SELECT 
-                request_type,
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed,
-                COALESCE(SUM(work_hours), 0) as total_hours
-            FROM requests
-            {date_filter}
-            GROUP BY request_type
-            ORDER BY total DESC
-        ''', params)
+def get_stats_by_org(start_date=None, end_date=None) -> list:
+    """按客户/机构统计"""
+    return get_cube(('org',), start_date=start_date, end_date=end_date,
+                    date_field='completed_at', order_by='total')
 
-        return [dict(row) for row in cursor.fetchall()]
 
+# ============================================================
+# 趋势时间序列（补齐空缺周期）
+# ============================================================
 
-def get_stats_by_org(start_date=None, end_date=None) -> list:
-    """按客户/机构统计"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
+# 时间粒度对应的 pandas 频率（与 CUBE_TIME_BUCKETS 的周期起始日一致）
+_TREND_FREQ = {'day': 'D', 'week': 'W-MON', 'month': 'MS', 'quarter': 'QS', 'year': 'YS'}
 
-        date_filter = ""
-        params = []
-        if start_date and end_date:
-            date_filter = "WHERE completed_at >= ? AND completed_at <= ?"
-            params = [start_date, end_date]
+# 补齐时不能填 0 的均值类指标
+_MEAN_MEASURES = ('avg_turnaround_hours',)
 
-        cursor.execute(f'''
-            SELECT 
-                org_name,
-                org_type,
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed,
-                COALESCE(SUM(work_hours), 0) as total_hours
-            FROM requests
-            {date_filter}
-            GROUP BY org_name
-            ORDER BY total DESC
-        ''', params)
 
-        return [dict(row) for row in cursor.fetchall()]
+def _column_alias(expr: str) -> str:
+    """SELECT 表达式的列名：'... AS total' -> 'total'，'r.org_name' -> 'org_name'"""
+    return expr.rsplit(' AS ', 1)[-1].split('.')[-1]
 
 
-def get_researcher_detail_stats(researcher_id: int, start_date=None, end_date=None) -> dict:
-    """获取单个研究员的详细统计"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
+def _bucket_start(ts: int, time_bucket: str) -> pd.Timestamp:
+    """epoch 秒所在周期的起始日（业务时区）"""
+    day = pd.Timestamp(from_ts(ts)).normalize()
+    if time_bucket == 'week':
+        return day - pd.Timedelta(days=day.weekday())
+    if time_bucket == 'month':
+        return day.replace(day=1)
+    if time_bucket == 'quarter':
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    if time_bucket == 'year':
+        return day.replace(month=1, day=1)
+    return day
 
-        date_filter = "WHERE r.researcher_id = ?"
-        params = [researcher_id]
-        if start_date and end_date:
-            date_filter += " AND r.completed_at >= ? AND r.completed_at <= ?"
-            params.extend([start_date, end_date])
 
-        # 总体统计
-        cursor.execute(f'''
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN r.status = 'completed' THEN 1 ELSE 0 END) as completed,
-                COALESCE(SUM(r.work_hours), 0) as total_hours
-            FROM requests r
-            {date_filter}
-        ''', params)
-        overview = dict(cursor.fetchone())
+@cached()
+def get_trend_series(time_bucket: str = 'day', start_date=None, end_date=None, split_by: str = None,
+                     measures=('count', 'work_hours'), date_field: str = 'created_at',
+                     filters: dict = None) -> list:
+    """
+    趋势时间序列：一次分组查询 + 向量化补齐，没有数据的周期补 0
+    time_bucket: 'day' | 'week' | 'month' | 'quarter' | 'year'
+    split_by: 可选拆分维度（CUBE_DIMENSIONS 中的名称），每个取值一条完整序列
+    返回: [{'bucket': 'YYYY-MM-DD', [拆分维度列], 指标列...}]，按周期升序
+    未指定时间范围时，以数据中的首末周期为范围
+    """
+    if time_bucket not in _TREND_FREQ:
+        raise ValueError(f"不支持的时间粒度: {time_bucket}")
 
-        # 按需求类型
-        cursor.execute(f'''
-            SELECT 
-                request_type,
-                COUNT(*) as total,
-                COALESCE(SUM(work_hours), 0) as hours
-            FROM requests r
-            {date_filter}
-            GROUP BY request_type
-        ''', params)
-        by_type = [dict(row) for row in cursor.fetchall()]
+    start_date, end_date = _ts_range(start_date, end_date)
+    dimensions = (split_by,) if split_by else ()
+    rows = get_cube(dimensions, tuple(measures), time_bucket=time_bucket, start_date=start_date,
+                    end_date=end_date, date_field=date_field, filters=filters)
 
-        # 按客户
-        cursor.execute(f'''
-            SELECT 
-                org_name,
-                org_type,
-                COUNT(*) as total,
-                COALESCE(SUM(work_hours), 0) as hours
-            FROM requests r
-            {date_filter}
-            GROUP BY org_name
-        ''', params)
-        by_org = [dict(row) for row in cursor.fetchall()]
+    value_cols = [_column_alias(CUBE_MEASURES[m]) for m in measures]
+    label = _column_alias(CUBE_DIMENSIONS[split_by][1][-1]) if split_by else None
 
-        return {
-            'overview': overview,
-            'by_type': by_type,
-            'by_org': by_org
-        }
+    df = pd.DataFrame(rows, columns=['bucket'] + ([label] if label else []) + value_cols)
+    df['bucket'] = pd.to_datetime(df['bucket'])
 
+    if start_date and end_date:
+        first, last = _bucket_start(start_date, time_bucket), _bucket_start(end_date, time_bucket)
+    elif not df.empty:
+        first, last = df['bucket'].min(), df['bucket'].max()
+    else:
+        return []
+    buckets = pd.date_range(first, last, freq=_TREND_FREQ[time_bucket], name='bucket')
+
+    if label:
+        df[label] = df[label].fillna('-')
+        agg = {c: ('mean' if c in _MEAN_MEASURES else 'sum') for c in value_cols}
+        df = df.groupby(['bucket', label]).agg(agg)
+        labels = df.index.get_level_values(label).unique()
+        if labels.empty:
+            return []
+        df = df.reindex(pd.MultiIndex.from_product([buckets, labels], names=['bucket', label]))
+    else:
+        df = df.set_index('bucket').reindex(buckets)
 
-def get_org_detail_stats(org_name: str, start_date=None, end_date=None) -> dict:
-    """获取单个客户的详细统计"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
+    for col in value_cols:
+        if col not in _MEAN_MEASURES:
+            df[col] = df[col].fillna(0).astype(float if col == 'total_hours' else int)
 
-        date_filter = "WHERE r.org_name = ?"
-        params = [org_name]
-        if start_date and end_date:
-            date_filter += " AND r.completed_at >= ? AND r.completed_at <= ?"
-            params.extend([start_date, end_date])
+    df = df.reset_index()
+    df['bucket'] = df['bucket'].dt.strftime('%Y-%m-%d')
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict('records')
 
-        # 总体统计
-        cursor.execute(f'''
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN r.status = 'completed' THEN 1 ELSE 0 END) as completed,
-                COALESCE(SUM(r.work_hours), 0) as total_hours
-            FROM requests r
-            {date_filter}
-        ''', params)
-        overview = dict(cursor.fetchone())
 
-        # 按需求类型
-        cursor.execute(f'''
-            SELECT 
-                request_type,
-                COUNT(*) as total,
-                COALESCE(SUM(work_hours), 0) as hours
-            FROM requests r
-            {date_filter}
-            GROUP BY request_type
-        ''', params)
-        by_type = [dict(row) for row in cursor.fetchall()]
+# ============================================================
+# 周期分析：完成周期分位数 + 未完成需求账龄
+# ============================================================
 
-        # 按研究员
-        cursor.execute(f'''
-            SELECT 
-                u.display_name as researcher_name,
-                COUNT(*) as total,
-                COALESCE(SUM(r.work_hours), 0) as hours
-            FROM requests r
-            JOIN users u ON r.researcher_id = u.id
-            {date_filter}
-            GROUP BY r.researcher_id
-        ''', params)
-        by_researcher = [dict(row) for row in cursor.fetchall()]
+TURNAROUND_PERCENTILES = (50, 90, 99)
 
-        # 需求列表
-        cursor.execute(f'''
-            SELECT r.*, 
-                   s.display_name as sales_name,
-                   res.display_name as researcher_name
-            FROM requests r
-            JOIN users s ON r.sales_id = s.id
-            JOIN users res ON r.researcher_id = res.id
-            {date_filter}
-            ORDER BY r.created_at DESC
-        ''', params)
-        requests = [dict(row) for row in cursor.fetchall()]
+# 账龄分段边界（天），最后一段为 ">= 最后一个边界"
+AGING_BINS_DAYS = (1, 3, 7, 14, 30)
 
-        return {
-            'overview': overview,
-            'by_type': by_type,
-            'by_researcher': by_researcher,
-            'requests': requests
-        }
 
+def _segment_percentiles(values: np.ndarray, group_index: np.ndarray, n_groups: int,
+                         percentiles) -> dict:
+    """
+    按组计算分位数（线性插值，与 np.percentile 默认方式一致）
+    一次 lexsort 排序后按各组起止位置取值，不逐组循环
+    """
+    order = np.lexsort((values, group_index))
+    values = values[order]
+    counts = np.bincount(group_index, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    result = {}
+    for p in percentiles:
+        pos = starts + (counts - 1) * (p / 100)
+        lo = np.floor(pos).astype(int)
+        hi = np.ceil(pos).astype(int)
+        result[p] = values[lo] + (values[hi] - values[lo]) * (pos - lo)
+    return result
+
+
+@cached()
+def get_turnaround_percentiles(dimension: str = 'researcher', start_date=None, end_date=None) -> list:
+    """
+    已完成需求的完成周期分位数（小时），按 completed_at 过滤时间范围
+    dimension: CUBE_DIMENSIONS 中的维度，如 'researcher' | 'request_type' | 'org'
+    返回: [{维度列, 'count', 'avg_hours', 'p50_hours', 'p90_hours', 'p99_hours'}]，按数量降序
+    """
+    if dimension not in CUBE_DIMENSIONS:
+        raise ValueError(f"不支持的统计维度: {dimension}")
+    start_date, end_date = _ts_range(start_date, end_date)
+
+    _, columns, join = CUBE_DIMENSIONS[dimension]
+    label_expr = columns[-1]
+    label = _column_alias(label_expr)
+
+    sql = f'''
+        SELECT {label_expr}, r.completed_at - r.created_at
+        FROM requests r {_CUBE_JOINS[join] if join else ''}
+        WHERE r.completed_at IS NOT NULL
+    '''
+    params = []
+    if start_date and end_date:
+        sql += " AND r.completed_at >= ? AND r.completed_at <= ?"
+        params = [start_date, end_date]
 
-def get_request_type_detail_stats(request_type: str, start_date=None, end_date=None) -> dict:
-    """获取单个需求类型的详细统计"""
     with get_connection() as conn:
         cursor = conn.cursor()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    if not rows:
+        return []
+
+    labels, seconds = zip(*rows)
+    labels = np.array(['-' if v is None else str(v) for v in labels])
+    # 数据异常（完成时间早于创建时间）按 0 计
+    hours = np.maximum(np.array(seconds, dtype=float), 0) / 3600
+
+    keys, group_index = np.unique(labels, return_inverse=True)
+    counts = np.bincount(group_index, minlength=len(keys))
+    sums = np.bincount(group_index, weights=hours, minlength=len(keys))
+    percentiles = _segment_percentiles(hours, group_index, len(keys), TURNAROUND_PERCENTILES)
+
+    result = []
+    for i, key in enumerate(keys):
+        item = {label: str(key), 'count': int(counts[i]), 'avg_hours': round(float(sums[i] / counts[i]), 1)}
+        for p in TURNAROUND_PERCENTILES:
+            item[f'p{p}_hours'] = round(float(percentiles[p][i]), 1)
+        result.append(item)
+    result.sort(key=lambda x: x['count'], reverse=True)
+    return result
+
+
+@cached()
+def _get_open_request_ages() -> tuple:
+    """未完成需求的 (状态列表, 创建时间列表)"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT status, created_at FROM requests
+            WHERE status IN ('pending', 'in_progress')
+        ''')
+        rows = cursor.fetchall()
+    if not rows:
+        return [], []
+    statuses, created = zip(*rows)
+    return list(statuses), list(created)
+
+
+def _aging_labels() -> list:
+    """账龄分段名称: ['<1天', '1-3天', ..., '30天以上']"""
+    edges = AGING_BINS_DAYS
+    labels = [f"<{edges[0]}天"]
+    labels += [f"{a}-{b}天" for a, b in zip(edges, edges[1:])]
+    labels.append(f"{edges[-1]}天以上")
+    return labels
+
+
+def get_open_request_aging() -> dict:
+    """
+    未完成需求（待处理/处理中）的账龄分布
+    账龄随当前时间变化，只缓存取数，分段每次按当前时间计算
+    返回: {
+        'histogram': [{'bucket', 'pending', 'in_progress', 'total'}],
+        'total': 未完成总数, 'median_days': 账龄中位数, 'max_days': 最长账龄,
+    }
+    """
+    statuses, created = _get_open_request_ages()
+    labels = _aging_labels()
+    if not created:
+        return {
+            'histogram': [{'bucket': b, 'pending': 0, 'in_progress': 0, 'total': 0} for b in labels],
+            'total': 0, 'median_days': 0, 'max_days': 0,
+        }
 
-        date_filter = "WHERE r.request_type = ?"
-        params = [request_type]
-        if start_date and end_date:
-            date_filter += " AND r.completed_at >= ? AND r.completed_at <= ?"
-            params.extend([start_date, end_date])
+    ages = np.maximum(now_ts() - np.array(created, dtype=float), 0) / 86400
+    bins = np.digitize(ages, AGING_BINS_DAYS)
+    pending = np.array(statuses) == 'pending'
+    pending_counts = np.bincount(bins[pending], minlength=len(labels))
+    progress_counts = np.bincount(bins[~pending], minlength=len(labels))
+
+    histogram = [
+        {'bucket': b, 'pending': int(p), 'in_progress': int(q), 'total': int(p + q)}
+        for b, p, q in zip(labels, pending_counts, progress_counts)
+    ]
+    return {
+        'histogram': histogram,
+        'total': len(created),
+        'median_days': round(float(np.median(ages)), 1),
+        'max_days': round(float(ages.max()), 1),
+    }
+
+
+# ============================================================
+# 详情统计：一次扫描得到总览 + 各维度分组
+# ============================================================
+
+# 分组维度 -> 输出字段
+_DETAIL_DIMENSIONS = {
+    'request_type': ('request_type',),
+    'org': ('org_name', 'org_type'),
+    'researcher': ('researcher_name',),
+}
+
+
+def _sort_key(value):
+    return (value is None, value if value is not None else '')
 
-        # 总体统计
-        cursor.execute(f'''
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN r.status = 'completed' THEN 1 ELSE 0 END) as completed,
-                COALESCE(SUM(r.work_hours), 0) as total_hours
-            FROM requests r
-            {date_filter}
-        ''', params)
-        overview = dict(cursor.fetchone())
 
-        # 按研究员
+def _aggregate_detail(records: list, dimensions: list) -> dict:
+    """
+    单次遍历聚合
+    records: 每项含 request_type/org_name/org_type/researcher_id/researcher_name/status，
+             以及 n（行数）与 hours（工时）
+    返回: {'overview': {...}, 'by_<维度>': [...]}
+    """
+    overview = {'total': 0, 'completed': 0, 'total_hours': 0.0}
+    groups = {dim: {} for dim in dimensions}
+
+    for rec in records:
+        n, hours = rec['n'], rec['hours'] or 0
+        overview['total'] += n
+        overview['total_hours'] += hours
+        if rec['status'] == 'completed':
+            overview['completed'] += n
+
+        for dim in dimensions:
+            # 研究员账号已删除的需求计入总览和其他维度，但不出现在研究员分组中
+            if dim == 'researcher' and rec['researcher_name'] is None:
+                continue
+            # 研究员按ID分组，机构按名称分组（客户类型取首次出现的值）
+            key = rec['researcher_id'] if dim == 'researcher' else rec[_DETAIL_DIMENSIONS[dim][0]]
+            item = groups[dim].get(key)
+            if item is None:
+                item = {field: rec[field] for field in _DETAIL_DIMENSIONS[dim]}
+                item.update(total=0, hours=0.0)
+                groups[dim][key] = item
+            item['total'] += n
+            item['hours'] += hours
+
+    result = {'overview': overview}
+    for dim in dimensions:
+        name = 'by_type' if dim == 'request_type' else f'by_{dim}'
+        result[name] = [groups[dim][k] for k in sorted(groups[dim], key=_sort_key)]
+    return result
+
+
+def _detail_filters(field: str, value, start_date, end_date) -> dict:
+    filters = {field: value}
+    if start_date and end_date:
+        filters.update(completed_from=start_date, completed_to=end_date)
+    return filters
+
+
+def _grouped_detail_stats(filters: dict, dimensions: list) -> dict:
+    """按最细粒度分组查询一次，再在内存中汇总出总览和各维度"""
+    conditions, params = build_request_filters(filters)
+    with get_connection() as conn:
+        cursor = conn.cursor()
         cursor.execute(f'''
             SELECT 
-                u.display_name as researcher_name,
-                COUNT(*) as total,
+                r.request_type, r.org_name, r.org_type, r.researcher_id,
+                u.display_name as researcher_name, r.status,
+                COUNT(*) as n,
                 COALESCE(SUM(r.work_hours), 0) as hours
             FROM requests r
-            JOIN users u ON r.researcher_id = u.id
-            {date_filter}
-            GROUP BY r.researcher_id
+            LEFT JOIN users u ON r.researcher_id = u.id
+            WHERE {" AND ".join(conditions) or "1=1"}
+            GROUP BY r.request_type, r.org_name, r.org_type, r.researcher_id, r.status
         ''', params)
-        by_researcher = [dict(row) for row in cursor.fetchall()]
+        records = [dict(row) for row in cursor.fetchall()]
 
-        # 按客户
-        cursor.execute(f'''
-            SELECT 
-                org_name,
-                org_type,
-                COUNT(*) as total,
-                COALESCE(SUM(work_hours), 0) as hours
-            FROM requests r
-            {date_filter}
-            GROUP BY org_name
-        ''', params)
-        by_org = [dict(row) for row in cursor.fetchall()]
+    return _aggregate_detail(records, dimensions)
 
-        return {
-            'overview': overview,
-            'by_researcher': by_researcher,
-            'by_org': by_org
-        }
 
+@cached()
+def get_researcher_detail_stats(researcher_id: int, start_date=None, end_date=None) -> dict:
+    """获取单个研究员的详细统计"""
+    start_date, end_date = _ts_range(start_date, end_date)
+    return _grouped_detail_stats(
+        _detail_filters('researcher_id', researcher_id, start_date, end_date),
+        ['request_type', 'org']
+    )
 
-def get_user_stats(user_id: int, role: str) -> dict:
-    """获取单个用户的统计数据（兼容旧代码）"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
 
-        field = 'sales_id' if role == 'sales' else 'researcher_id'
+@cached()
+def get_org_detail_stats(org_name: str, start_date=None, end_date=None) -> dict:
+    """获取单个客户的详细统计（需求列表由页面分页查询）"""
+    start_date, end_date = _ts_range(start_date, end_date)
+    return _grouped_detail_stats(
+        _detail_filters('org_name', org_name, start_date, end_date),
+        ['request_type', 'researcher']
+    )
 
-        cursor.execute(f'''
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending,
-                SUM(CASE WHEN status = 'in_progress' THEN 1 ELSE 0 END) as in_progress,
-                SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed
-            FROM requests
-            WHERE {field} = ?
-        ''', (user_id,))
 
-        row = cursor.fetchone()
-        return dict(row) if row else {'total': 0, 'pending': 0, 'in_progress': 0, 'completed': 0}
+@cached()
+def get_request_type_detail_stats(request_type: str, start_date=None, end_date=None) -> dict:
+    """获取单个需求类型的详细统计"""
+    start_date, end_date = _ts_range(start_date, end_date)
+    return _grouped_detail_stats(
+        _detail_filters('request_type', request_type, start_date, end_date),
+        ['researcher', 'org']
+    )
+
+
+def get_user_stats(user_id: int, role: str) -> dict:
+    """获取单个用户的统计数据（兼容旧代码）"""
+    field = 'sales_id' if role == 'sales' else 'researcher_id'
+    rows = get_cube((), ('count', 'pending', 'in_progress', 'completed'), filters={field: user_id})
+    row = rows[0] if rows else {}
+    return {k: row.get(k) or 0 for k in ('total', 'pending', 'in_progress', 'completed')}
 
 
 # ============================================================
 # 新增：多时间维度统计
 # ============================================================
 
+def _period_starts() -> tuple:
+    """今日/本周/本月/当季/今年 的起始时间（业务时区；作为缓存键的一部分，跨天自动失效）"""
+    now = now_local()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start = today_start - timedelta(days=now.weekday())
+    month_start = today_start.replace(day=1)
+
+    # 当季开始
+    quarter = (now.month - 1) // 3
+    quarter_start = today_start.replace(month=quarter * 3 + 1, day=1)
+
+    # 今年开始
+    year_start = today_start.replace(month=1, day=1)
+
+    return today_start, week_start, month_start, quarter_start, year_start
+
+
 def get_multi_period_stats_by_researcher() -> list:
     """获取按研究员的多时间维度统计（今日/本周/本月/当季/今年）"""
+    return _query_multi_period_by_researcher(*_period_starts())
+
+
+def _multi_period_columns() -> str:
+    """汇总表上的今日/本周/当月/当季/今年 需求数和工时（已完成）列"""
+    columns = []
+    for period in ('today', 'week', 'month', 'quarter', 'year'):
+        columns.append(
+            f"COALESCE(SUM(CASE WHEN d.day >= :{period} THEN d.request_count END), 0) as {period}_count"
+        )
+        columns.append(
+            f"COALESCE(SUM(CASE WHEN d.day >= :{period} AND d.status = 'completed' "
+            f"THEN d.work_hours END), 0) as {period}_hours"
+        )
+    return ",\n                ".join(columns)
+
+
+def _period_params(today_start, week_start, month_start, quarter_start, year_start) -> dict:
+    """汇总表按日期字符串比较"""
+    return {
+        'today': today_start.strftime('%Y-%m-%d'),
+        'week': week_start.strftime('%Y-%m-%d'),
+        'month': month_start.strftime('%Y-%m-%d'),
+        'quarter': quarter_start.strftime('%Y-%m-%d'),
+        'year': year_start.strftime('%Y-%m-%d'),
+    }
+
+
+@cached()
+def _query_multi_period_by_researcher(today_start, week_start, month_start, quarter_start, year_start) -> list:
     with get_connection() as conn:
         cursor = conn.cursor()
 
-        now = datetime.now()
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        week_start = today_start - timedelta(days=now.weekday())
-        month_start = today_start.replace(day=1)
-
-        # 当季开始
-        quarter = (now.month - 1) // 3
-        quarter_start = today_start.replace(month=quarter * 3 + 1, day=1)
-
-        # 今年开始
-        year_start = today_start.replace(month=1, day=1)
-
-        cursor.execute('''
+        # 只读今年以来的日汇总行，与历史数据量无关
+        cursor.execute(f'''
             SELECT 
                 u.id,
                 u.display_name as researcher_name,
-
-                -- 今日
-                SUM(CASE WHEN r.created_at >= ? THEN 1 ELSE 0 END) as today_count,
-                COALESCE(SUM(CASE WHEN r.created_at >= ? AND r.status = 'completed' THEN r.work_hours ELSE 0 END), 0) as today_hours,
-
-                -- 本周
-                SUM(CASE WHEN r.created_at >= ? THEN 1 ELSE 0 END) as week_count,
-                COALESCE(SUM(CASE WHEN r.created_at >= ? AND r.status = 'completed' THEN r.work_hours ELSE 0 END), 0) as week_hours,
-
-                -- 当月
-                SUM(CASE WHEN r.created_at >= ? THEN 1 ELSE 0 END) as month_count,
-                COALESCE(SUM(CASE WHEN r.created_at >= ? AND r.status = 'completed' THEN r.work_hours ELSE 0 END), 0) as month_hours,
-
-                -- 当季
-                SUM(CASE WHEN r.created_at >= ? THEN 1 ELSE 0 END) as quarter_count,
-                COALESCE(SUM(CASE WHEN r.created_at >= ? AND r.status = 'completed' THEN r.work_hours ELSE 0 END), 0) as quarter_hours,
-
-                -- 今年以来
-                SUM(CASE WHEN r.created_at >= ? THEN 1 ELSE 0 END) as year_count,
-                COALESCE(SUM(CASE WHEN r.created_at >= ? AND r.status = 'completed' THEN r.work_hours ELSE 0 END), 0) as year_hours
-
+                {_multi_period_columns()}
             FROM users u
-            LEFT JOIN requests r ON r.researcher_id = u.id
+            LEFT JOIN request_daily_rollup d
+                ON d.researcher_id = u.id AND d.day >= :year
             WHERE u.role = 'researcher'
             GROUP BY u.id
             ORDER BY year_hours DESC
-        ''', (today_start, today_start, week_start, week_start, month_start, month_start,
-              quarter_start, quarter_start, year_start, year_start))
+        ''', _period_params(today_start, week_start, month_start, quarter_start, year_start))
 
         return [dict(row) for row in cursor.fetchall()]
 
 
 def get_multi_period_stats_by_request_type() -> list:
     """获取按需求类型的多时间维度统计（今日/本周/本月/当季/今年）"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
+    return _query_multi_period_by_request_type(*_period_starts())
 
-        now = datetime.now()
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        week_start = today_start - timedelta(days=now.weekday())
-        month_start = today_start.replace(day=1)
 
-        # 当季开始
-        quarter = (now.month - 1) // 3
-        quarter_start = today_start.replace(month=quarter * 3 + 1, day=1)
-
-        # 今年开始
-        year_start = today_start.replace(month=1, day=1)
+@cached()
+def _query_multi_period_by_request_type(today_start, week_start, month_start, quarter_start, year_start) -> list:
+    with get_connection() as conn:
+        cursor = conn.cursor()
 
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT 
-                request_type,
-
-                -- 今日
-                SUM(CASE WHEN created_at >= ? THEN 1 ELSE 0 END) as today_count,
-                COALESCE(SUM(CASE WHEN created_at >= ? AND status = 'completed' THEN work_hours ELSE 0 END), 0) as today_hours,
-
-                -- 本周
-                SUM(CASE WHEN created_at >= ? THEN 1 ELSE 0 END) as week_count,
-                COALESCE(SUM(CASE WHEN created_at >= ? AND status = 'completed' THEN work_hours ELSE 0 END), 0) as week_hours,
-
-                -- 当月
-                SUM(CASE WHEN created_at >= ? THEN 1 ELSE 0 END) as month_count,
-                COALESCE(SUM(CASE WHEN created_at >= ? AND status = 'completed' THEN work_hours ELSE 0 END), 0) as month_hours,
-
-                -- 当季
-                SUM(CASE WHEN created_at >= ? THEN 1 ELSE 0 END) as quarter_count,
-                COALESCE(SUM(CASE WHEN created_at >= ? AND status = 'completed' THEN work_hours ELSE 0 END), 0) as quarter_hours,
-
-                -- 今年以来
-                SUM(CASE WHEN created_at >= ? THEN 1 ELSE 0 END) as year_count,
-                COALESCE(SUM(CASE WHEN created_at >= ? AND status = 'completed' THEN work_hours ELSE 0 END), 0) as year_hours
-
-            FROM requests
-            GROUP BY request_type
+                NULLIF(d.request_type, '') as request_type,
+                {_multi_period_columns()}
+            FROM request_daily_rollup d
+            WHERE d.day >= :year
+            GROUP BY d.request_type
             ORDER BY year_hours DESC
-        ''', (today_start, today_start, week_start, week_start, month_start, month_start,
-              quarter_start, quarter_start, year_start, year_start))
+        ''', _period_params(today_start, week_start, month_start, quarter_start, year_start))
 
         return [dict(row) for row in cursor.fetchall()]
 
@@ -456,46 +639,15 @@ def get_filtered_requests_for_export(
 ) -> list:
     """
     获取筛选后的需求列表（用于导出）
+    request_type / researcher_id / org_name / status 可传单值或列表
     """
-    with get_connection() as conn:
-        cursor = conn.cursor()
-
-        # 构建WHERE子句
-        where_clauses = []
-        params = []
-
-        if start_date and end_date:
-            where_clauses.append("r.created_at >= ? AND r.created_at <= ?")
-            params.extend([start_date, end_date])
-
-        if request_type:
-            where_clauses.append("r.request_type = ?")
-            params.append(request_type)
-
-        if researcher_id:
-            where_clauses.append("r.researcher_id = ?")
-            params.append(researcher_id)
-
-        if org_name:
-            where_clauses.append("r.org_name = ?")
-            params.append(org_name)
-
-        if status:
-            where_clauses.append("r.status = ?")
-            params.append(status)
-
-        where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-
-        query = f'''
-            SELECT r.*, 
-                   s.display_name as sales_name,
-                   res.display_name as researcher_name
-            FROM requests r
-            JOIN users s ON r.sales_id = s.id
-            JOIN users res ON r.researcher_id = res.id
-            WHERE {where_sql}
-            ORDER BY r.created_at DESC
-        '''
-
-        cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
\ No newline at end of file
+    filters = {
+        'request_type': request_type,
+        'researcher_id': researcher_id,
+        'org_name': org_name,
+        'status': status,
+    }
+    if start_date and end_date:
+        filters.update(created_from=start_date, created_to=end_date)
+
+    return get_filtered_requests(filters)
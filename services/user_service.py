@@ -1,5 +1,6 @@
 # services/user_service.py - 用户相关业务逻辑
 
+from core.cache import bump_data_version
 from core.database import get_connection, hash_password
 
 
@@ -38,6 +39,7 @@ def create_user(username: str, password: str, role: str, display_name: str) -> t
                 (username, hash_password(password), role, display_name)
             )
             conn.commit()
+            bump_data_version()
             return True, "创建成功"
         except Exception as e:
             return False, f"用户名已存在或创建失败: {e}"
@@ -49,6 +51,7 @@ def delete_user(user_id: int):
         cursor = conn.cursor()
         cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
         conn.commit()
+        bump_data_version()
 
 
 def update_user_password(user_id: int, new_password: str):